@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Benchmark for decoding API responses.
+
+Parses every fixture in discogs_client/tests/res, as bytes, the way
+responses used to be parsed (decoding to a string, then json.loads) and with
+each decoder discogs_client.decoders has available.
+
+    python benchmarks/decoding.py [repeat]
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from discogs_client import decoders
+from discogs_client.exceptions import ConfigurationError
+
+RES = os.path.join(ROOT, 'discogs_client', 'tests', 'res')
+
+
+def load_fixtures():
+    fixtures = []
+    for dirpath, dirnames, filenames in os.walk(RES):
+        for filename in filenames:
+            if filename.endswith('.json'):
+                with open(os.path.join(dirpath, filename), 'rb') as f:
+                    fixtures.append(f.read())
+    return fixtures
+
+
+def previous(content):
+    return json.loads(content.decode('utf8'))
+
+
+def main(repeat=200):
+    fixtures = load_fixtures()
+    print('fixtures: {0} ({1} KB)'.format(len(fixtures), sum(len(f) for f in fixtures) // 1024))
+
+    candidates = [('decode + json', previous)]
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            candidates.append((name, decoders.get_decoder(name)))
+        except ConfigurationError:
+            print('{0}: not installed'.format(name))
+
+    baseline = None
+    for name, decoder in candidates:
+        seconds = min(timeit.repeat(lambda: [decoder(f) for f in fixtures], number=repeat, repeat=3))
+        us = seconds / repeat * 1e6
+        baseline = baseline or us
+        print('{0:<14} {1:9.1f} us per pass  ({2:.1f}x)'.format(name, us, baseline / us))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for model field access.
+
+Reads release fields the way a loop over a tracklist does, with the
+descriptors' memoized values (the default) and with the memo cleared before
+every read, which is what each access used to cost.
+
+    python benchmarks/descriptors.py [repeat]
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from discogs_client import Client
+from discogs_client.models import Release
+
+RES = os.path.join(ROOT, 'discogs_client', 'tests', 'res')
+
+
+def load_release():
+    with open(os.path.join(RES, 'releases', '1.json')) as f:
+        data = json.load(f)
+    # Make the tracklist long enough to show the quadratic pattern
+    data['tracklist'] = data['tracklist'] * 10
+    return Release(Client('benchmark/1.0'), data)
+
+
+def tracklist_loop(release, memoized):
+    for i, track in enumerate(release.tracklist):
+        if not memoized:
+            release._field_values = None
+        release.tracklist[i].title
+
+
+def field_reads(release, memoized):
+    for _ in range(100):
+        if not memoized:
+            release._field_values = None
+        release.artists
+        release.labels
+        release.tracklist
+
+
+def main(repeat=200):
+    release = load_release()
+    print('tracks: {0}'.format(len(release.tracklist)))
+    for name, func in (('tracklist loop', tracklist_loop), ('field reads', field_reads)):
+        results = []
+        for memoized in (False, True):
+            seconds = min(timeit.repeat(lambda: func(release, memoized), number=repeat, repeat=3))
+            results.append(seconds / repeat * 1e6)
+        print('{0:<16} rebuilt: {1:9.1f} us  memoized: {2:9.1f} us  ({3:.1f}x)'.format(
+            name, results[0], results[1], results[0] / results[1]))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
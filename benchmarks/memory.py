@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Memory benchmark for model objects.
+
+Builds a synthetic 100k-item paginated inventory (listings) and measures,
+with tracemalloc, how much memory the model objects add on top of the
+decoded JSON. For comparison, the same pages are wrapped by the models of a
+baseline revision, read with git (by default, the first commit of the
+repository).
+
+    python benchmarks/memory.py [items] [baseline revision]
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gc
+import os
+import subprocess
+import sys
+import tracemalloc
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from discogs_client import Client, models
+
+PER_PAGE = 100
+
+
+def load_models(revision=None):
+    """Imports discogs_client/models.py as of a git revision."""
+    def git(*args):
+        return subprocess.check_output(('git',) + args, cwd=ROOT).decode('utf8')
+
+    if revision is None:
+        revision = git('rev-list', '--max-parents=0', 'HEAD').split()[0]
+    module = types.ModuleType('baseline_models')
+    module.__file__ = 'models.py@' + revision
+    exec(compile(git('show', revision + ':discogs_client/models.py'), module.__file__, 'exec'),
+         module.__dict__)
+    return module
+
+
+def make_pages(items):
+    pages = []
+    for start in range(0, items, PER_PAGE):
+        pages.append({'listings': [{
+            'id': i,
+            'status': 'For Sale',
+            'condition': 'Mint (M)',
+            'price': {'value': 10.0, 'currency': 'USD'},
+            'release': {'id': i, 'description': 'Release {0}'.format(i)},
+        } for i in range(start, min(start + PER_PAGE, items))]})
+    return pages
+
+
+def measure(models_module, items):
+    client = Client('benchmark/1.0')
+    pages = make_pages(items)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    inventory = models_module.PaginatedList(client, client._base_url + '/users/example/inventory',
+                                            'listings', models_module.Listing)
+    objects = [[inventory._transform(item) for item in page['listings']] for page in pages]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert sum(len(page) for page in objects) == items
+    return after - before
+
+
+def main(items=100000, revision=None):
+    baseline = load_models(revision)
+    print('items: {0}, baseline: {1}'.format(items, baseline.__file__))
+    results = []
+    for name, models_module in (('baseline', baseline), ('current', models)):
+        size = measure(models_module, items)
+        results.append(size)
+        print('{0:<18} {1:8.1f} MiB  {2:6.0f} bytes/item'.format(name, size / 2 ** 20, size / items))
+    print('reduction: {0:.0%}'.format(1 - results[1] / results[0]))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100000, *args[1:])
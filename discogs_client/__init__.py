@@ -1,4 +1,5 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
+import sys
 
 __version_info__ = 2, 2, 2
 __version__ = '2.2.2'
@@ -6,3 +7,6 @@ __version__ = '2.2.2'
 from discogs_client.client import Client
 from discogs_client.models import Artist, Release, Master, Label, User, \
     Listing, Track, Price, Video
+
+if sys.version_info >= (3, 6):
+    from discogs_client.aio import AsyncClient
@@ -0,0 +1,282 @@
+"""
+asyncio support: an AsyncClient and the async fetchers it talks through.
+
+Objects returned by an AsyncClient are the usual models, with the same
+fields. Since reading a field can't block, an object has to be loaded with
+`await obj.refresh_async()` before reading fields its partial data lacks, and
+paginated lists are consumed with `async for` or `await lst.page_async(n)`
+(after which len() and pages work as usual). The bulk methods, artists(),
+releases(), masters() and labels(), are consumed with `async for` too.
+
+Requires Python 3.6+. The default network fetcher requires aiohttp.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+import asyncio
+import json
+
+from oauthlib import oauth1
+
+from discogs_client.client import Client
+from discogs_client.exceptions import ConfigurationError
+from discogs_client.utils import build_url
+from discogs_client import models
+
+
+class AsyncFetcher(object):
+    """
+    Base class for async Fetchers. Mirrors discogs_client.fetchers.Fetcher,
+    except that fetch() and close() are coroutines.
+    """
+    async def fetch(self, client, method, url, data=None, headers=None, json=True):
+        """Fetch the given request
+
+        Returns
+        -------
+        content : bytes
+        status_code : int
+        headers : dict-like, optional
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        """Release any resources (e.g. pooled connections) held by the fetcher."""
+        pass
+
+
+class AiohttpFetcher(AsyncFetcher):
+    """
+    Fetches via HTTP from the Discogs API using aiohttp, optionally with
+    user_token authentication.
+
+    pool_maxsize caps the number of simultaneous connections. timeout is a
+    number of seconds or a (connect, read) tuple.
+    """
+    def __init__(self, user_token=None, pool_maxsize=100, timeout=None, session=None):
+        try:
+            import aiohttp
+        except ImportError:
+            raise ConfigurationError('AiohttpFetcher requires the aiohttp package.')
+        self._aiohttp = aiohttp
+        self.user_token = user_token
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.session = session
+
+    def _get_session(self):
+        # aiohttp wants its sessions created from within a running event loop,
+        # so don't create one until the first request.
+        if self.session is None:
+            if isinstance(self.timeout, tuple):
+                connect, read = self.timeout
+                timeout = self._aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            else:
+                timeout = self._aiohttp.ClientTimeout(total=self.timeout)
+            connector = self._aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self.session = self._aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    def _sign(self, method, url, data, headers):
+        return url, headers, data
+
+    async def fetch(self, client, method, url, data=None, headers=None, json=True):
+        url, headers, data = self._sign(method, url, data, headers)
+        params = {'token': self.user_token} if self.user_token else None
+        async with self._get_session().request(method, url, params=params,
+                                               data=data, headers=headers) as resp:
+            content = await resp.read()
+            return content, resp.status, resp.headers
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AiohttpOAuth2Fetcher(AiohttpFetcher):
+    """
+    Fetches via HTTP + OAuth 1.0a from the Discogs API using aiohttp. Use the
+    synchronous Client to go through the authorization process, then pass the
+    access token and secret here.
+    """
+    def __init__(self, consumer_key, consumer_secret, token=None, secret=None, **kwargs):
+        super(AiohttpOAuth2Fetcher, self).__init__(**kwargs)
+        self.client = oauth1.Client(consumer_key, client_secret=consumer_secret,
+                                    resource_owner_key=token,
+                                    resource_owner_secret=secret)
+
+    def _sign(self, method, url, data, headers):
+        return self.client.sign(url, http_method=method, body=data, headers=headers)
+
+
+class AsyncMemoryFetcher(AsyncFetcher):
+    """Fetches from a dict of URL -> (content, status_code)."""
+    default_response = json.dumps({'message': 'Resource not found.'}).encode('utf8'), 404
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    async def fetch(self, client, method, url, data=None, headers=None, json=True):
+        return self.responses.get(url, self.default_response)
+
+
+class AsyncClient(Client):
+    """
+    An asyncio interface to the Discogs API.
+
+    Takes the same arguments as Client, except that the OAuth authorization
+    process must be completed with a Client beforehand. Pass `fetcher` to use
+    an AsyncFetcher other than aiohttp. Retries wait with asyncio.sleep();
+    rate limiters, caches and coalescing are blocking, and aren't supported.
+    """
+    def __init__(self, user_agent, consumer_key=None, consumer_secret=None, token=None, secret=None,
+                 user_token=None, pool_maxsize=100, timeout=None, fetcher=None, identity_map=False,
+                 decoder=None, retry=None):
+        if fetcher is None:
+            options = {'pool_maxsize': pool_maxsize, 'timeout': timeout}
+            if consumer_key and consumer_secret:
+                fetcher = AiohttpOAuth2Fetcher(consumer_key, consumer_secret, token, secret, **options)
+            else:
+                fetcher = AiohttpFetcher(user_token, **options)
+        super(AsyncClient, self).__init__(user_agent, pool_maxsize=pool_maxsize, timeout=timeout,
+                                          identity_map=identity_map, fetcher=fetcher, decoder=decoder,
+                                          retry=retry)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with an AsyncClient.')
+
+    async def close(self):
+        """Close the pooled HTTP connections held by this client."""
+        await self._fetcher.close()
+
+    def set_consumer_key(self, consumer_key, consumer_secret):
+        raise ConfigurationError('Authorize with a Client, then pass the tokens to AsyncClient.')
+
+    def get_authorize_url(self, callback_url=None):
+        raise ConfigurationError('Authorize with a Client, then pass the tokens to AsyncClient.')
+
+    def get_access_token(self, verifier):
+        raise ConfigurationError('Authorize with a Client, then pass the tokens to AsyncClient.')
+
+    def _request(self, method, url, data=None):
+        raise ConfigurationError(
+            'AsyncClient cannot make blocking requests; await refresh_async() '
+            'or page_async() before reading data that is not loaded yet, and '
+            'use the _async methods. ({0} {1})'.format(method, url)
+        )
+
+    async def _request_async(self, method, url, data=None):
+        headers = self._prepare_request(method, url, data)
+        event = self._before_request(method, url) if self.hooks else None
+        try:
+            content, status_code = await self._send_async(method, url, data, headers, event)
+            if event is not None:
+                self._after_response(event, content, status_code)
+            return self._parse_response(content, status_code)
+        except Exception as e:
+            if event is not None:
+                self._on_error(event, e)
+            raise
+
+    async def _send_async(self, method, url, data=None, headers=None, event=None):
+        policy = self.retry_policy
+        retries = 0
+        while True:
+            try:
+                result = await self._fetcher.fetch(self, method, url, data=data, headers=headers)
+            except Exception as e:
+                if policy is None or not policy.retries_error(method, e, retries):
+                    raise
+                retries += 1
+                await self._back_off_async(policy, retries, None, event)
+                continue
+
+            content, status_code = result[:2]
+            if policy is not None and policy.retries_status(method, status_code, retries):
+                retries += 1
+                await self._back_off_async(policy, retries, result[2] if len(result) > 2 else {}, event)
+                continue
+            return content, status_code
+
+    async def _back_off_async(self, policy, retries, response_headers, event):
+        delay = policy.backoff(retries, response_headers)
+        await asyncio.sleep(delay)
+        if event is not None:
+            event.retries = retries
+            event.backoff += delay
+
+    async def _get_async(self, url):
+        return await self._request_async('GET', url)
+
+    async def _refresh_async(self, obj):
+        if obj.data.get('resource_url'):
+            obj._loaded(await self._get_async(obj.data['resource_url']))
+
+    async def _save_async(self, obj):
+        request = obj._save_request()
+        if request is not None:
+            await self._request_async(*request)
+
+            # Refresh the object, in case there were side-effects
+            await self._refresh_async(obj)
+
+    async def _page_async(self, paginated, index):
+        page = paginated._pages.get(index)
+        if page is None:
+            data = await self._get_async(paginated._url_for_page(index))
+            page = paginated._parse_page(data)
+            paginated._store_page(index, page)
+            paginated._update_pagination_info(data)
+        return page
+
+    async def _iter_async(self, paginated):
+        index = 1
+        while True:
+            for item in await self._page_async(paginated, index):
+                yield item
+            if index >= paginated._num_pages:
+                break
+            index += 1
+
+    async def _refresh_many(self, objects, max_workers=8):
+        """
+        Refresh objects, up to max_workers at a time, yielding (object, error)
+        tuples in the order they complete, as an async generator.
+        """
+        async def refresh(obj):
+            try:
+                await obj.refresh_async()
+            except Exception as e:
+                return obj, e
+            return obj, None
+
+        pending = set()
+        try:
+            for obj in objects:
+                pending.add(asyncio.ensure_future(refresh(obj)))
+                if len(pending) >= max_workers:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def fee_for_async(self, price, currency='USD'):
+        """Awaitable version of fee_for()."""
+        resp = await self._get_async(build_url(self._base_url, ('marketplace', 'fee', '{0:.4f}'.format(price), currency)))
+        return models.Price(self, {'value': resp['value'], 'currency': resp['currency']})
+
+    async def identity_async(self):
+        """Awaitable version of identity()."""
+        resp = await self._get_async(self._base_url + '/oauth/identity')
+        return models.wrap(self, models.User, resp)
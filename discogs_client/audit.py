@@ -0,0 +1,127 @@
+"""
+Finding N+1 request patterns.
+
+Reading a field an object's partial data lacks refreshes the object, one
+request per object. In a loop such as
+
+    [r.master.title for r in artist.releases]
+
+that's one request per item. A RefreshAudit records each of these implicit
+refreshes along with the attribute that triggered it and the line of your
+code that read it, and reports the lines where objects of one class were
+refreshed repeatedly:
+
+    with RefreshAudit(client) as audit:
+        run_the_code()
+    print(audit.report())
+
+With strict=True, the refresh that reaches `threshold` raises an
+NPlusOneError instead, e.g. to fail a test suite.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sys
+import threading
+from collections import namedtuple
+
+from discogs_client.exceptions import NPlusOneError
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# A call site and what was refreshed there: `count` objects of `class_name`,
+# when reading `attribute`.
+Finding = namedtuple('Finding', ['class_name', 'attribute', 'filename', 'lineno', 'function', 'count'])
+
+
+class RefreshAudit(object):
+    """
+    Records the implicit refreshes made through `client` while active (as a
+    context manager, or between start() and stop()). Call sites where
+    `threshold` or more objects of a class were refreshed are reported.
+    """
+    def __init__(self, client, threshold=3, strict=False):
+        self.client = client
+        self.threshold = threshold
+        self.strict = strict
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        self.client.refresh_audit = self
+        return self
+
+    def stop(self):
+        if self.client.refresh_audit is self:
+            self.client.refresh_audit = None
+
+    @property
+    def refreshes(self):
+        """The total number of implicit refreshes recorded."""
+        with self._lock:
+            return sum(self._counts.values())
+
+    def record(self, obj, key):
+        """Called by an object about to refresh because `key` is missing."""
+        filename, lineno, function = _call_site()
+        site = (obj.__class__.__name__, _attribute(obj.__class__, key), filename, lineno, function)
+        with self._lock:
+            count = self._counts[site] = self._counts.get(site, 0) + 1
+        if self.strict and count >= self.threshold:
+            finding = Finding(*(site + (count,)))
+            raise NPlusOneError(_describe(finding), finding)
+
+    def findings(self, threshold=None):
+        """Returns the Findings at or over threshold, the worst first."""
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            counts = list(self._counts.items())
+        findings = [Finding(*(site + (count,))) for site, count in counts if count >= threshold]
+        return sorted(findings, key=lambda f: (-f.count, f.filename, f.lineno))
+
+    def report(self):
+        """A human-readable summary of the findings."""
+        findings = self.findings()
+        if not findings:
+            return '{0} implicit refreshes, no N+1 patterns.'.format(self.refreshes)
+        lines = ['{0} implicit refreshes, {1} N+1 patterns:'.format(self.refreshes, len(findings))]
+        lines.extend('  ' + _describe(finding) for finding in findings)
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+def _describe(finding):
+    return '{0} {1} refreshes for .{2} at {3}:{4} in {5}()'.format(
+        finding.count, finding.class_name, finding.attribute,
+        finding.filename, finding.lineno, finding.function,
+    )
+
+
+def _attribute(class_, key):
+    """The name of the attribute of class_ that reads `key`, or key itself."""
+    for klass in class_.__mro__:
+        for name, value in vars(klass).items():
+            if key in (getattr(value, 'name', None), getattr(value, 'url_key', None)):
+                return name
+    return key
+
+
+def _call_site():
+    """The innermost frame outside of this package (its tests excepted)."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if os.path.dirname(os.path.abspath(filename)) != PACKAGE_DIR:
+            return filename, frame.f_lineno, frame.f_code.co_name
+        frame = frame.f_back
+    return '<unknown>', 0, '<unknown>'
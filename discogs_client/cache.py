@@ -0,0 +1,365 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple, OrderedDict
+
+from discogs_client.utils import url_template
+
+
+CacheEntry = namedtuple('CacheEntry', ['content', 'status_code', 'headers', 'expires'])
+
+
+class Cache(object):
+    """
+    Base class for caches of GET responses, keyed by URL and by the
+    credentials they were requested with (see auth_scope()), so that clients
+    authenticated as different users can share a cache. Pass one to
+    Client(cache=...), or wrap a fetcher with CachingFetcher.
+
+    Entries are fresh for `ttl` seconds, or for the number of seconds given
+    in `ttls` for their endpoint, e.g. {'/releases/{id}': 86400,
+    '/database/search': 60}. An endpoint with a TTL of 0 isn't cached. Once
+    there are more than `max_entries` entries, or their content takes up more
+    than `max_bytes`, the least recently used entries are evicted.
+
+    Stale entries whose response carried an ETag or Last-Modified header are
+    kept, and revalidated with If-None-Match/If-Modified-Since the next time
+    they're requested: a 304 answer makes them fresh again without
+    transferring the body.
+
+    `hits` and `misses` count lookups; revalidated entries count as hits and
+    are also counted by `revalidations`.
+    """
+    def __init__(self, ttl=300, ttls=None, max_entries=None, max_bytes=None, clock=None):
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._clock = clock or time.time
+        self._lock = threading.RLock()
+
+    def ttl_for(self, url):
+        return self.ttls.get(url_template(url), self.ttl)
+
+    def fetch(self, method, url, headers, fetch, scope=None):
+        """
+        Serves a GET request from the entries cached for `scope`, or makes it
+        by calling fetch(headers) and caches a successful response. Any other
+        request invalidates the cached copies of the resource it was made to,
+        for every scope. Returns (content, status_code, headers).
+        """
+        if method != 'GET':
+            result = fetch(headers)
+            self.invalidate(url)
+            return result
+
+        with self._lock:
+            entry, fresh = self._lookup(_key(url, scope))
+            if fresh:
+                self.hits += 1
+                return entry.content, entry.status_code, entry.headers
+
+        validators = _validators(entry.headers) if entry is not None else {}
+        if validators:
+            headers = dict(headers or {}, **validators)
+
+        result = fetch(headers)
+        content, status_code = result[:2]
+        response_headers = result[2] if len(result) > 2 else {}
+
+        if status_code == 304 and validators:
+            # Still valid: keep the body we have and any new validators
+            stored_headers = dict(entry.headers)
+            stored_headers.update(_validator_headers(response_headers))
+            self.set(url, entry.content, entry.status_code, stored_headers, scope)
+            with self._lock:
+                self.hits += 1
+                self.revalidations += 1
+            return entry.content, entry.status_code, stored_headers
+
+        with self._lock:
+            self.misses += 1
+        if status_code == 200:
+            self.set(url, content, status_code, response_headers, scope)
+        return content, status_code, response_headers
+
+    def get(self, url, scope=None):
+        """Returns the fresh CacheEntry for a URL, or None."""
+        with self._lock:
+            entry, fresh = self._lookup(_key(url, scope))
+            if fresh:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _lookup(self, key):
+        """
+        Returns (entry, fresh). Expired entries are dropped unless they can
+        be revalidated.
+        """
+        entry = self._get(key)
+        if entry is None:
+            return None, False
+        if entry.expires > self._clock():
+            return entry, True
+        if not _validators(entry.headers):
+            self._delete(key)
+            return None, False
+        return entry, False
+
+    def set(self, url, content, status_code, headers, scope=None):
+        ttl = self.ttl_for(url)
+        if not ttl:
+            return
+        entry = CacheEntry(content, status_code, dict(headers or {}), self._clock() + ttl)
+        with self._lock:
+            self._set(_key(url, scope), entry)
+            self._evict()
+
+    def invalidate(self, url):
+        """
+        Forget a resource after it's been changed: every cached URL at or
+        below it, and its parent collection.
+        """
+        resource = url.split('?', 1)[0].rstrip('/')
+        parent = resource.rsplit('/', 1)[0]
+        with self._lock:
+            self._delete_matching(resource, subresources=True)
+            self._delete_matching(parent, subresources=False)
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def _get(self, url):
+        raise NotImplementedError()
+
+    def _set(self, url, entry):
+        raise NotImplementedError()
+
+    def _delete(self, url):
+        raise NotImplementedError()
+
+    def _delete_matching(self, url, subresources):
+        """
+        Deletes url, url?<any query>, url#<any scope> and, if subresources,
+        url/<anything>.
+        """
+        raise NotImplementedError()
+
+    def _evict(self):
+        raise NotImplementedError()
+
+
+def auth_scope(fetcher):
+    """
+    Returns a digest of the credentials a fetcher sends (its user token or
+    OAuth access token), or None for an unauthenticated fetcher.
+    """
+    token = getattr(fetcher, 'user_token', None)
+    if token is None:
+        token = getattr(getattr(fetcher, 'client', None), 'resource_owner_key', None)
+    if token is None:
+        return None
+    return hashlib.sha256(token.encode('utf8')).hexdigest()[:16]
+
+
+def _key(url, scope):
+    # Request URLs never have a fragment, so one can hold the scope
+    if scope is None:
+        return url
+    return url + '#' + scope
+
+
+def _validator_headers(headers):
+    return dict((k, v) for k, v in (headers or {}).items()
+                if k.lower() in ('etag', 'last-modified'))
+
+
+def _validators(headers):
+    """Returns the conditional request headers that revalidate a response."""
+    validators = {}
+    for name, value in _validator_headers(headers).items():
+        if name.lower() == 'etag':
+            validators['If-None-Match'] = value
+        else:
+            validators['If-Modified-Since'] = value
+    return validators
+
+
+def _matches(key, url, subresources):
+    if key == url or key.startswith(url + '?') or key.startswith(url + '#'):
+        return True
+    return subresources and key.startswith(url + '/')
+
+
+class MemoryCache(Cache):
+    """An in-memory LRU cache."""
+    def __init__(self, *args, **kwargs):
+        super(MemoryCache, self).__init__(*args, **kwargs)
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _get(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            # Move it to the most recently used end
+            self._entries[url] = entry
+        return entry
+
+    def _set(self, url, entry):
+        self._delete(url)
+        self._entries[url] = entry
+        self._size += len(entry.content)
+
+    def _delete(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._size -= len(entry.content)
+
+    def _delete_matching(self, url, subresources):
+        for key in [k for k in self._entries if _matches(k, url, subresources)]:
+            self._delete(key)
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries) or
+            (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            url, entry = self._entries.popitem(last=False)
+            self._size -= len(entry.content)
+
+
+class SqliteCache(Cache):
+    """
+    An LRU cache kept in a SQLite database, which persists between runs.
+
+    Hits don't write to the database: when entries were last used is kept in
+    memory, and only written when entries have to be evicted or the cache is
+    closed.
+    """
+    def __init__(self, path, *args, **kwargs):
+        super(SqliteCache, self).__init__(*args, **kwargs)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, content BLOB, status_code INTEGER, '
+            'headers TEXT, expires REAL, size INTEGER, used INTEGER)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+        self._db.commit()
+        self._counter = self._db.execute('SELECT COALESCE(MAX(used), 0) FROM responses').fetchone()[0]
+        # url -> when it was last used, for hits not written yet
+        self._used = {}
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._write_used()
+            self._db.commit()
+            self._db.close()
+
+    def clear(self):
+        with self._lock:
+            self._used.clear()
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
+
+    def _touch(self):
+        self._counter += 1
+        return self._counter
+
+    def _get(self, url):
+        row = self._db.execute(
+            'SELECT content, status_code, headers, expires FROM responses WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._used[url] = self._touch()
+        content, status_code, headers, expires = row
+        return CacheEntry(bytes(content), status_code, json.loads(headers), expires)
+
+    def _write_used(self):
+        self._db.executemany('UPDATE responses SET used = ? WHERE url = ?',
+                             [(used, url) for url, used in self._used.items()])
+        self._used.clear()
+
+    def _set(self, url, entry):
+        self._used.pop(url, None)
+        self._db.execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, sqlite3.Binary(entry.content), entry.status_code,
+             json.dumps(entry.headers), entry.expires, len(entry.content), self._touch())
+        )
+        self._db.commit()
+
+    def _delete(self, url):
+        self._used.pop(url, None)
+        self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+        self._db.commit()
+
+    def _delete_matching(self, url, subresources):
+        # Compare prefixes with substr() rather than LIKE, since URLs are full
+        # of LIKE's wildcard characters.
+        query = 'DELETE FROM responses WHERE url = ? OR substr(url, 1, ?) IN (?, ?)'
+        params = [url, len(url) + 1, url + '?', url + '#']
+        if subresources:
+            query += ' OR substr(url, 1, ?) = ?'
+            params += [len(url) + 1, url + '/']
+        self._db.execute(query, params)
+        self._db.commit()
+
+    def _evict(self):
+        count, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        while count and (
+            (self.max_entries is not None and count > self.max_entries) or
+            (self.max_bytes is not None and size > self.max_bytes)
+        ):
+            if self._used:
+                self._write_used()
+            url, entry_size = self._db.execute(
+                'SELECT url, size FROM responses ORDER BY used LIMIT 1'
+            ).fetchone()
+            self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            self._used.pop(url, None)
+            count -= 1
+            size -= entry_size
+        self._db.commit()
+
+
+class CachingFetcher(object):
+    """Wraps a fetcher and serves GET requests from a Cache."""
+    def __init__(self, fetcher, cache):
+        self.fetcher = fetcher
+        self.cache = cache
+
+    def __getattr__(self, name):
+        # Expose the wrapped fetcher's API (store_token() and the like)
+        return getattr(self.fetcher, name)
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        return self.cache.fetch(method, url, headers, lambda headers: self.fetcher.fetch(
+            client, method, url, data, headers, json
+        ), auth_scope(self.fetcher))
+
+    def close(self):
+        self.fetcher.close()
@@ -1,7 +1,7 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import warnings
-import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 try:
     # python2
     from urllib import urlencode
@@ -9,9 +9,15 @@ except ImportError:
     # python3
     from urllib.parse import urlencode
 
-from discogs_client import models
-from discogs_client.exceptions import ConfigurationError, HTTPError, AuthorizationError
-from discogs_client.utils import update_qs
+from discogs_client import decoders, models
+from discogs_client.cache import auth_scope
+from discogs_client.coalesce import SingleFlight
+from discogs_client.exceptions import ConfigurationError, HTTPError, AuthorizationError, \
+    RateLimitError
+from discogs_client.hooks import Hooks, RequestEvent
+from discogs_client.ratelimit import RateLimiter
+from discogs_client.retry import RetryPolicy
+from discogs_client.utils import build_url, canonical_url
 from discogs_client.fetchers import RequestsFetcher, OAuth2Fetcher, UserTokenRequestsFetcher
 
 
@@ -21,21 +27,96 @@ class Client(object):
     _authorize_url = 'https://www.discogs.com/oauth/authorize'
     _access_token_url = 'https://api.discogs.com/oauth/access_token'
 
-    def __init__(self, user_agent, consumer_key=None, consumer_secret=None, token=None, secret=None, user_token=None):
-        """An interface to the Discogs API."""
+    def __init__(self, user_agent, consumer_key=None, consumer_secret=None, token=None, secret=None, user_token=None,
+                 pool_connections=10, pool_maxsize=10, timeout=None, rate_limiter=None,
+                 cache=None, identity_map=False, fetcher=None, decoder=None, retry=None, coalesce=False):
+        """
+        An interface to the Discogs API.
+
+        HTTP connections are pooled and kept alive between requests.
+        pool_connections and pool_maxsize size the connection pool, and
+        timeout (seconds, or a (connect, read) tuple) applies to every request.
+        Call close() (or use the client as a context manager) to release the
+        pooled connections.
+
+        Pass rate_limiter=True (or a RateLimiter instance, which may be shared
+        between clients) to pace requests according to the Discogs rate
+        limit headers and to back off and retry when the server answers 429.
+
+        Pass retry=True (or a RetryPolicy) to retry idempotent requests that
+        fail transiently: 5xx responses, dropped connections and timeouts.
+
+        Pass a cache (see discogs_client.cache) to serve repeated GET requests
+        from it instead of the network.
+
+        With identity_map=True, every reference to the same artist, release,
+        etc. is the same object, so it's only ever refreshed once.
+
+        A client, and the objects and lists it returns, may be shared
+        between threads.
+
+        With coalesce=True, GET requests made from several threads at once
+        for the same URL are coalesced: one of them goes out, and the others
+        share its response.
+
+        Pass a fetcher to get responses from somewhere other than the API,
+        e.g. a discogs_client.dumps.DumpFetcher. Authentication arguments are
+        ignored then.
+
+        Responses are parsed with orjson if it's installed, or json (see
+        discogs_client.decoders). Pass decoder='json' (or 'orjson', 'ujson',
+        or a function taking bytes) to choose another.
+        """
         self.user_agent = user_agent
         self.verbose = False
-        self._fetcher = RequestsFetcher()
+        if rate_limiter is True:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter
+        if retry is True:
+            retry = RetryPolicy()
+        self.retry_policy = retry
+        self.cache = cache
+        self.single_flight = SingleFlight() if coalesce else None
+        self.decoder = decoders.get_decoder(decoder)
+        self.hooks = Hooks()
+        # Set by discogs_client.audit.RefreshAudit while it's active
+        self.refresh_audit = None
+        self._identity_map = models.IdentityMap() if identity_map else None
+        self.partial_fields = models.PartialFields()
+        self.missing_keys = models.MissingKeys()
+        self._fetcher_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'timeout': timeout,
+        }
+        if fetcher is not None:
+            self._fetcher = fetcher
+            return
+        self._fetcher = RequestsFetcher(**self._fetcher_options)
 
         if consumer_key and consumer_secret:
             self.set_consumer_key(consumer_key, consumer_secret)
             if token and secret:
                 self.set_token(token, secret)
         elif user_token is not None:
-            self._fetcher = UserTokenRequestsFetcher(user_token)
+            self._set_fetcher(UserTokenRequestsFetcher(user_token, **self._fetcher_options))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the pooled HTTP connections held by this client."""
+        self._fetcher.close()
+
+    def _set_fetcher(self, fetcher):
+        old_fetcher, self._fetcher = self._fetcher, fetcher
+        old_fetcher.close()
 
     def set_consumer_key(self, consumer_key, consumer_secret):
-        self._fetcher = OAuth2Fetcher(consumer_key, consumer_secret)
+        self._set_fetcher(OAuth2Fetcher(consumer_key, consumer_secret, **self._fetcher_options))
 
     def set_token(self, token, secret):
         try:
@@ -58,7 +139,7 @@ class Client(object):
             params['oauth_callback'] = callback_url
         postdata = urlencode(params)
 
-        content, status_code = self._fetcher.fetch(self, 'POST', self._request_token_url, data=postdata, headers=params)
+        content, status_code, _ = self._fetch('POST', self._request_token_url, data=postdata, headers=params)
         if status_code != 200:
             raise AuthorizationError('Could not get request token.', status_code, content)
 
@@ -81,7 +162,7 @@ class Client(object):
         params = {}
         params['User-Agent'] = self.user_agent
 
-        content, status_code = self._fetcher.fetch(self, 'POST', self._access_token_url, headers=params)
+        content, status_code, _ = self._fetch('POST', self._access_token_url, headers=params)
         if status_code != 200:
             raise HTTPError('Invalid response from access token URL.', status_code)
 
@@ -93,7 +174,116 @@ class Client(object):
         if not self.user_agent:
             raise ConfigurationError('Invalid or no User-Agent set.')
 
+    def _fetch(self, method, url, data=None, headers=None, event=None):
+        """
+        Fetch a request through the cache and rate limiter, if any. Returns a
+        tuple of (content, status_code, headers).
+        """
+        if self.cache is not None:
+            return self.cache.fetch(method, url, headers, lambda headers: self._send(method, url, data, headers, event),
+                                    auth_scope(self._fetcher))
+        return self._send(method, url, data, headers, event)
+
+    def _send(self, method, url, data=None, headers=None, event=None):
+        limiter = self.rate_limiter
+        policy = self.retry_policy
+        throttled = 0
+        retries = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+
+            try:
+                result = self._fetcher.fetch(self, method, url, data=data, headers=headers)
+            except Exception as e:
+                if policy is None or not policy.retries_error(method, e, retries):
+                    raise
+                retries += 1
+                self._back_off(policy, retries, None, event, throttled)
+                continue
+
+            content, status_code = result[:2]
+            response_headers = result[2] if len(result) > 2 else {}
+
+            if limiter is not None:
+                limiter.record(status_code, response_headers)
+                if status_code == 429 and throttled < limiter.max_retries:
+                    throttled += 1
+                    if event is not None:
+                        event.retries = throttled + retries
+                    continue
+            if policy is not None and policy.retries_status(method, status_code, retries):
+                retries += 1
+                self._back_off(policy, retries, response_headers, event, throttled)
+                continue
+            break
+
+        return content, status_code, response_headers
+
+    def _back_off(self, policy, retries, response_headers, event, throttled):
+        delay = policy.backoff(retries, response_headers)
+        policy.sleep(delay)
+        if event is not None:
+            event.retries = throttled + retries
+            event.backoff += delay
+
     def _request(self, method, url, data=None):
+        if method == 'GET' and self.single_flight is not None:
+            return self._request_shared(method, url)
+        return self._send_request(method, url, data)
+
+    def _request_shared(self, method, url):
+        # The callers waiting on the request share its raw response, and each
+        # decodes it, so that none of them gets another's dicts.
+        parsed = []
+
+        def parse(content, status_code):
+            parsed.append(self._parse_response(content, status_code))
+            return content, status_code
+
+        content, status_code = self.single_flight.do(
+            canonical_url(url), lambda: self._send_request(method, url, parse=parse))
+        if parsed:
+            # This caller made the request
+            return parsed[0]
+        return self._parse_response(content, status_code)
+
+    def _send_request(self, method, url, data=None, parse=None):
+        parse = parse or self._parse_response
+        headers = self._prepare_request(method, url, data)
+        if not self.hooks:
+            content, status_code, response_headers = self._fetch(method, url, data=data, headers=headers)
+            return parse(content, status_code)
+
+        event = self._before_request(method, url)
+        try:
+            content, status_code, response_headers = self._fetch(method, url, data=data, headers=headers,
+                                                                 event=event)
+            self._after_response(event, content, status_code)
+            return parse(content, status_code)
+        except Exception as e:
+            self._on_error(event, e)
+            raise
+
+    def _before_request(self, method, url):
+        event = RequestEvent(method, url)
+        self.hooks.emit('before_request', event)
+        return event
+
+    def _after_response(self, event, content, status_code):
+        event._finish()
+        event.status_code = status_code
+        event.bytes = len(content) if content else 0
+        self.hooks.emit('after_response', event)
+
+    def _on_error(self, event, error):
+        if event.latency is None:
+            event._finish()
+        event.error = error
+        self.hooks.emit('on_error', event)
+
+    def _prepare_request(self, method, url, data=None):
+        """Returns the headers to send with a request."""
         if self.verbose:
             print(' '.join((method, url)))
 
@@ -107,15 +297,18 @@ class Client(object):
         if data:
             headers['Content-Type'] = 'application/x-www-form-urlencoded'
 
-        content, status_code = self._fetcher.fetch(self, method, url, data=data, headers=headers)
+        return headers
 
+    def _parse_response(self, content, status_code):
         if status_code == 204:
             return None
 
-        body = json.loads(content.decode('utf8'))
+        body = self.decoder(content)
 
         if 200 <= status_code < 300:
             return body
+        elif status_code == 429:
+            raise RateLimitError(body['message'], status_code)
         else:
             raise HTTPError(body['message'], status_code)
 
@@ -134,12 +327,29 @@ class Client(object):
     def _put(self, url, data):
         return self._request('PUT', url, data)
 
+    # Awaitable counterparts of refresh(), save() and page() on models; only
+    # AsyncClient can make non-blocking requests.
+    def _refresh_async(self, obj):
+        raise ConfigurationError('refresh_async() requires an AsyncClient.')
+
+    def _save_async(self, obj):
+        raise ConfigurationError('save_async() requires an AsyncClient.')
+
+    def _page_async(self, paginated, index):
+        raise ConfigurationError('page_async() requires an AsyncClient.')
+
+    def _iter_async(self, paginated):
+        raise ConfigurationError('async for requires an AsyncClient.')
+
     def search(self, *query, **fields):
         """
         Search the Discogs database. Returns a paginated list of objects
         (Artists, Releases, Masters, and Labels). The keyword arguments to this
-        function are serialized into the request's query string.
+        function are serialized into the request's query string, except for
+        `fields`: a list of attributes every result should have loaded (see
+        BasePaginatedResponse.ensure()).
         """
+        ensure_fields = fields.pop('fields', None)
         if query:
             unicode_query = []
             for q in query:
@@ -149,46 +359,113 @@ class Client(object):
                     unicode_q = q
                 unicode_query.append(unicode_q)
             fields['q'] = ' '.join(unicode_query)
-        return models.MixedPaginatedList(
+        results = models.MixedPaginatedList(
             self,
-            update_qs(self._base_url + '/database/search', fields),
+            build_url(self._base_url, ('database', 'search'), fields),
             'results'
         )
+        if ensure_fields:
+            results.ensure(*ensure_fields)
+        return results
 
     def artist(self, id):
         """Fetch an Artist by ID."""
-        return models.Artist(self, {'id': id})
+        return models.wrap(self, models.Artist, {'id': id})
 
     def release(self, id):
         """Fetch a Release by ID."""
-        return models.Release(self, {'id': id})
+        return models.wrap(self, models.Release, {'id': id})
 
     def master(self, id):
         """Fetch a Master by ID."""
-        return models.Master(self, {'id': id})
+        return models.wrap(self, models.Master, {'id': id})
 
     def label(self, id):
         """Fetch a Label by ID."""
-        return models.Label(self, {'id': id})
+        return models.wrap(self, models.Label, {'id': id})
+
+    def artists(self, ids, max_workers=8):
+        """
+        Fetch many Artists by ID, up to max_workers at a time. Yields
+        (artist, error) tuples as each artist is loaded: error is None, or the
+        exception raised while fetching that artist.
+        """
+        return self._refresh_many((models.wrap(self, models.Artist, {'id': id}) for id in ids), max_workers)
+
+    def releases(self, ids, max_workers=8):
+        """
+        Fetch many Releases by ID, up to max_workers at a time. Yields
+        (release, error) tuples as each release is loaded: error is None, or
+        the exception raised while fetching that release.
+        """
+        return self._refresh_many((models.wrap(self, models.Release, {'id': id}) for id in ids), max_workers)
+
+    def masters(self, ids, max_workers=8):
+        """
+        Fetch many Masters by ID, up to max_workers at a time. Yields
+        (master, error) tuples as each master is loaded: error is None, or the
+        exception raised while fetching that master.
+        """
+        return self._refresh_many((models.wrap(self, models.Master, {'id': id}) for id in ids), max_workers)
+
+    def labels(self, ids, max_workers=8):
+        """
+        Fetch many Labels by ID, up to max_workers at a time. Yields
+        (label, error) tuples as each label is loaded: error is None, or the
+        exception raised while fetching that label.
+        """
+        return self._refresh_many((models.wrap(self, models.Label, {'id': id}) for id in ids), max_workers)
+
+    def _refresh_many(self, objects, max_workers=8):
+        """
+        Refresh objects on a thread pool, yielding (object, error) tuples in
+        the order they complete. Only a couple of objects per worker are
+        queued at a time, so `objects` may be a long generator.
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = set()
+        try:
+            for obj in objects:
+                pending.add(executor.submit(_refresh_one, obj))
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def user(self, username):
         """Fetch a User by username."""
-        return models.User(self, {'username': username})
+        return models.wrap(self, models.User, {'username': username})
 
     def listing(self, id):
         """Fetch a Marketplace Listing by ID."""
-        return models.Listing(self, {'id': id})
+        return models.wrap(self, models.Listing, {'id': id})
 
     def order(self, id):
         """Fetch an Order by ID."""
-        return models.Order(self, {'id': id})
+        return models.wrap(self, models.Order, {'id': id})
 
     def fee_for(self, price, currency='USD'):
         """Calculate the fee for selling an item on the Marketplace."""
-        resp = self._get('{0}/marketplace/fee/{1:.4f}/{2}'.format(self._base_url, price, currency))
+        resp = self._get(build_url(self._base_url, ('marketplace', 'fee', '{0:.4f}'.format(price), currency)))
         return models.Price(self, {'value': resp['value'], 'currency': resp['currency']})
 
     def identity(self):
         """Return a User object representing the OAuth-authorized user."""
         resp = self._get(self._base_url + '/oauth/identity')
-        return models.User(self, resp)
+        return models.wrap(self, models.User, resp)
+
+
+def _refresh_one(obj):
+    try:
+        obj.refresh()
+    except Exception as e:
+        return obj, e
+    return obj, None
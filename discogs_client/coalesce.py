@@ -0,0 +1,68 @@
+"""
+Coalescing concurrent identical requests.
+
+When several threads ask for the same resource at once, e.g. a pool of
+workers reading `listing.release` for listings of the same release, only the
+first actually requests it; the others wait for it and share its result.
+Client(coalesce=True) shares raw responses this way.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Runs at most one call per key at a time. do(key, fn) calls fn() unless a
+    call for the same key is already in flight, in which case it waits for
+    that call and returns its result (or raises its exception) instead.
+
+    `calls` counts the calls made and `shared` the ones that were avoided.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if leader:
+            return self._run(key, call, fn)
+        return self._wait(call)
+
+    def _run(self, key, call, fn):
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def _wait(self, call):
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
@@ -0,0 +1,58 @@
+"""
+JSON decoders for API responses.
+
+Each decoder takes the response body as bytes, as the fetchers return it,
+and parses it without decoding it to a string first. By default, orjson is
+used if it's installed, and the standard library otherwise: both parse
+floats (e.g. prices) exactly. ujson, which may round them, has to be chosen
+explicitly.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import sys
+
+from discogs_client.exceptions import ConfigurationError
+
+
+def json_loads(content):
+    if sys.version_info < (3, 6) and isinstance(content, bytes):
+        # json only accepts bytes from 3.6 on
+        content = content.decode('utf8')
+    return json.loads(content)
+
+
+def _import(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+def get_decoder(name=None):
+    """
+    Returns the decoder function for a backend: 'orjson', 'ujson' or
+    'json'. Without a name, returns orjson's if it's installed, or json's.
+    """
+    if callable(name):
+        return name
+    if name is None:
+        return loads
+    if name == 'json':
+        return json_loads
+    if name not in ('orjson', 'ujson'):
+        raise ValueError('Unknown JSON decoder: {0!r}'.format(name))
+    module = _import(name)
+    if module is None:
+        raise ConfigurationError('The {0} package is not installed.'.format(name))
+    return module.loads
+
+
+def _default():
+    module = _import('orjson')
+    if module is not None:
+        return module.loads
+    return json_loads
+
+
+loads = _default()
@@ -0,0 +1,262 @@
+"""
+Offline access to the monthly Discogs data dumps (https://data.discogs.com/).
+
+A DumpStore loads the artists, labels, masters and releases dumps into a
+SQLite database, one record at a time, converting each to the JSON the API
+returns for it. A DumpFetcher then serves /artists/{id}, /labels/{id},
+/masters/{id} and /releases/{id} from the store, so the usual models work
+offline:
+
+    store = DumpStore('discogs.db')
+    store.ingest('discogs_20240101_releases.xml.gz')
+    client = Client('ExampleApplication/0.1', fetcher=DumpFetcher(store))
+    client.release(1).tracklist
+
+The dumps don't include the lists that hang off those resources (an
+artist's releases, a master's versions, ...); pass a `fallback` fetcher to
+get everything else from somewhere else, e.g. the API.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gzip
+import json
+import re
+import sqlite3
+import threading
+from xml.etree import ElementTree
+try:
+    # python2
+    from urlparse import urlsplit
+except ImportError:
+    # python3
+    from urllib.parse import urlsplit
+
+from six import string_types
+
+from discogs_client.fetchers import Fetcher
+
+
+API_URL = 'https://api.discogs.com'
+SITE_URL = 'https://www.discogs.com'
+
+# Elements whose children make up a list
+LIST_TAGS = frozenset([
+    'aliases', 'artists', 'companies', 'descriptions', 'extraartists', 'formats',
+    'genres', 'groups', 'identifiers', 'images', 'labels', 'members',
+    'namevariations', 'styles', 'sub_tracks', 'sublabels', 'tracklist', 'urls',
+    'videos',
+])
+INT_KEYS = frozenset(['id', 'main_release', 'year', 'width', 'height'])
+
+_RESOURCE_PATH = re.compile(r'^/(artists|labels|masters|releases)/(\d+)$')
+
+
+def iter_dump(source):
+    """
+    Yields (kind, data) for each record in a dump, where kind is 'artists',
+    'labels', 'masters' or 'releases' and data is the record as the API
+    would return it. `source` is a path (gzipped if it ends in .gz) or a
+    binary file object. Records are converted and discarded one by one, so
+    memory use doesn't grow with the size of the dump.
+    """
+    if isinstance(source, string_types):
+        f = gzip.open(source, 'rb') if source.endswith('.gz') else open(source, 'rb')
+    else:
+        f = source
+    try:
+        depth = 0
+        root = None
+        for event, elem in ElementTree.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                kind = root.tag
+                yield kind, CONVERTERS[kind](elem)
+                # Drop the record we're done with
+                root.clear()
+    finally:
+        if f is not source:
+            f.close()
+
+
+def _convert(elem):
+    if elem.tag in LIST_TAGS:
+        return [_convert(child) for child in elem]
+    value = dict((k, _number(k, v)) for k, v in elem.attrib.items())
+    children = list(elem)
+    if not children:
+        text = (elem.text or '').strip()
+        if not value:
+            return _number(elem.tag, text)
+        if text:
+            # e.g. <name id="1">The Persuader</name>
+            value['name'] = text
+        return value
+    for child in children:
+        value[child.tag] = _convert(child)
+    return value
+
+
+def _number(key, value):
+    if key in INT_KEYS and value.isdigit():
+        return int(value)
+    return value
+
+
+def _convert_videos(data):
+    for video in data.get('videos', []):
+        if 'src' in video:
+            video['uri'] = video.pop('src')
+
+
+def _convert_artist(elem):
+    data = _convert(elem)
+    if 'members' in data:
+        # Members are listed both as <id> and as <name id="...">
+        data['members'] = [m for m in data['members'] if isinstance(m, dict)]
+    data['resource_url'] = '{0}/artists/{1}'.format(API_URL, data['id'])
+    data['releases_url'] = data['resource_url'] + '/releases'
+    data['uri'] = '{0}/artist/{1}'.format(SITE_URL, data['id'])
+    return data
+
+
+def _convert_label(elem):
+    data = _convert(elem)
+    if 'contactinfo' in data:
+        data['contact_info'] = data.pop('contactinfo')
+    if 'parentLabel' in data:
+        data['parent_label'] = data.pop('parentLabel')
+    data['resource_url'] = '{0}/labels/{1}'.format(API_URL, data['id'])
+    data['releases_url'] = data['resource_url'] + '/releases'
+    data['uri'] = '{0}/label/{1}'.format(SITE_URL, data['id'])
+    return data
+
+
+def _convert_master(elem):
+    data = _convert(elem)
+    _convert_videos(data)
+    data['resource_url'] = '{0}/masters/{1}'.format(API_URL, data['id'])
+    data['versions_url'] = data['resource_url'] + '/versions'
+    if 'main_release' in data:
+        data['main_release_url'] = '{0}/releases/{1}'.format(API_URL, data['main_release'])
+    data['uri'] = '{0}/master/{1}'.format(SITE_URL, data['id'])
+    return data
+
+
+def _convert_release(elem):
+    data = _convert(elem)
+    _convert_videos(data)
+    master = data.pop('master_id', None)
+    if isinstance(master, dict) and master.get('name', '').isdigit():
+        data['master_id'] = int(master['name'])
+    elif isinstance(master, string_types) and master.isdigit():
+        data['master_id'] = int(master)
+    released = data.get('released', '')
+    if released[:4].isdigit():
+        data['year'] = int(released[:4])
+    data['resource_url'] = '{0}/releases/{1}'.format(API_URL, data['id'])
+    data['uri'] = '{0}/release/{1}'.format(SITE_URL, data['id'])
+    return data
+
+
+CONVERTERS = {
+    'artists': _convert_artist,
+    'labels': _convert_label,
+    'masters': _convert_master,
+    'releases': _convert_release,
+}
+
+
+class DumpStore(object):
+    """
+    A SQLite database of records from the data dumps, keyed by kind
+    ('artists', 'labels', 'masters' or 'releases') and ID, each stored as the
+    JSON the API would return.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS resources ('
+            'kind TEXT NOT NULL, id INTEGER NOT NULL, data BLOB NOT NULL, '
+            'PRIMARY KEY (kind, id))'
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count()
+
+    def count(self, kind=None):
+        with self._lock:
+            if kind is None:
+                return self._db.execute('SELECT COUNT(*) FROM resources').fetchone()[0]
+            return self._db.execute('SELECT COUNT(*) FROM resources WHERE kind = ?', (kind,)).fetchone()[0]
+
+    def ingest(self, source, batch_size=1000):
+        """
+        Load a dump (see iter_dump()) into the store, replacing the records
+        already there with the same IDs. Returns the number of records loaded.
+        """
+        count = 0
+        batch = []
+        for kind, data in iter_dump(source):
+            batch.append((kind, data['id'], sqlite3.Binary(json.dumps(data).encode('utf8'))))
+            if len(batch) >= batch_size:
+                count += self._insert(batch)
+                batch = []
+        if batch:
+            count += self._insert(batch)
+        return count
+
+    def _insert(self, rows):
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO resources VALUES (?, ?, ?)', rows)
+            self._db.commit()
+        return len(rows)
+
+    def get(self, kind, id):
+        """Returns the JSON for a record, as bytes, or None."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT data FROM resources WHERE kind = ? AND id = ?', (kind, int(id))
+            ).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class DumpFetcher(Fetcher):
+    """
+    Serves artists, labels, masters and releases from a DumpStore (or the
+    path to one). Other requests go to `fallback`, if given, and are
+    otherwise answered with a 404.
+    """
+    default_response = json.dumps({'message': 'Resource not found.'}).encode('utf8'), 404
+
+    def __init__(self, store, fallback=None):
+        if not isinstance(store, DumpStore):
+            store = DumpStore(store)
+        self.store = store
+        self.fallback = fallback
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        match = _RESOURCE_PATH.match(urlsplit(url).path) if method == 'GET' else None
+        if match is not None:
+            content = self.store.get(*match.groups())
+            if content is not None:
+                return content, 200
+        if self.fallback is not None:
+            return self.fallback.fetch(client, method, url, data, headers, json)
+        return self.default_response
+
+    def close(self):
+        if self.fallback is not None:
+            self.fallback.close()
+        self.store.close()
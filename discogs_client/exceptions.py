@@ -30,3 +30,18 @@ class AuthorizationError(HTTPError):
     def __init__(self, message, code, response):
         super(AuthorizationError, self).__init__(message, code)
         self.msg = '{0} Response: {1!r}'.format(self.msg, response)
+
+
+class RateLimitError(HTTPError):
+    """The server kept rejecting requests for exceeding the rate limit."""
+    pass
+
+
+class NPlusOneError(DiscogsAPIError):
+    """A strict RefreshAudit caught objects being refreshed one by one in a loop."""
+    def __init__(self, msg, finding):
+        self.msg = msg
+        self.finding = finding
+
+    def __str__(self):
+        return self.msg
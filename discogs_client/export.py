@@ -0,0 +1,241 @@
+"""
+Exporting long paginated lists, such as a label's releases or a user's
+inventory, on a pool of processes.
+
+Parsing pages and building objects from them takes more CPU than a single
+process has once there are thousands of pages. export() splits the pages
+between worker processes, which each fetch and parse their share with a
+client of their own, and writes the items to a sink in the list's order:
+
+    with open('inventory.jsonl', 'w') as f:
+        export(me.inventory, JSONLinesSink(f), processes=4)
+
+Workers are given the client's configuration (a ClientConfig), never the
+client itself: its connections, cache and hooks stay in the calling process.
+Each item is turned into a plain record, by default its data dict, before
+being sent back; pass a `transform` (a module-level function, so that it can
+be pickled) to pick what's exported.
+
+Requires Python 3.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import copy
+import csv
+import json
+import multiprocessing
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from discogs_client.client import Client
+from discogs_client.fetchers import SessionFetcher, OAuth2Fetcher, UserTokenRequestsFetcher
+from discogs_client.models import APIObject
+from discogs_client.ratelimit import RateLimiter
+
+if sys.version_info < (3,):
+    raise ImportError('discogs_client.export requires Python 3.')
+
+
+class ClientConfig(object):
+    """
+    What it takes to build a client like another one, in a form that can be
+    pickled and sent to another process: its user agent, credentials,
+    connection options, retry policy, rate limit and decoder.
+
+    HTTP fetchers are rebuilt from their credentials; any other fetcher (a
+    MemoryFetcher, a DumpFetcher...) is sent along as is, and has to be
+    picklable. Caches, hooks and identity maps aren't carried over.
+
+    `rate_limit` is the (limit, period) of each client built from the
+    config, or None for no rate limiting, and `rate_limit_share` the number
+    of clients the account's limit is split between (see RateLimiter).
+    """
+    def __init__(self, user_agent, base_url=Client._base_url, fetcher_options=None,
+                 user_token=None, consumer_key=None, consumer_secret=None, token=None, secret=None,
+                 fetcher=None, retry=None, rate_limit=None, rate_limit_share=1, decoder=None):
+        self.user_agent = user_agent
+        self.base_url = base_url
+        self.fetcher_options = fetcher_options or {}
+        self.user_token = user_token
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.token = token
+        self.secret = secret
+        self.fetcher = fetcher
+        self.retry = retry
+        self.rate_limit = rate_limit
+        self.rate_limit_share = rate_limit_share
+        self.decoder = decoder
+        # Lets a worker process reuse the client it built for this config
+        self.key = uuid.uuid4().hex
+
+    @classmethod
+    def from_client(cls, client):
+        config = cls(
+            client.user_agent,
+            base_url=client._base_url,
+            fetcher_options=dict(client._fetcher_options),
+            retry=client.retry_policy,
+            decoder=client.decoder,
+        )
+        limiter = client.rate_limiter
+        if limiter is not None:
+            config.rate_limit = (limiter.limit, limiter.period)
+            config.rate_limit_share = limiter.share
+
+        fetcher = client._fetcher
+        if isinstance(fetcher, UserTokenRequestsFetcher):
+            config.user_token = fetcher.user_token
+        elif isinstance(fetcher, OAuth2Fetcher):
+            oauth = fetcher.client
+            config.consumer_key, config.consumer_secret = oauth.client_key, oauth.client_secret
+            config.token, config.secret = oauth.resource_owner_key, oauth.resource_owner_secret
+        elif not isinstance(fetcher, SessionFetcher):
+            config.fetcher = fetcher
+        return config
+
+    def client(self):
+        """Builds a new Client from the configuration."""
+        rate_limiter = None
+        if self.rate_limit is not None:
+            limit, period = self.rate_limit
+            rate_limiter = RateLimiter(limit=limit, period=period, share=self.rate_limit_share)
+        client = Client(
+            self.user_agent, consumer_key=self.consumer_key, consumer_secret=self.consumer_secret,
+            token=self.token, secret=self.secret, user_token=self.user_token,
+            rate_limiter=rate_limiter, fetcher=self.fetcher, decoder=self.decoder,
+            retry=self.retry, **self.fetcher_options
+        )
+        client._base_url = self.base_url
+        return client
+
+
+class JSONLinesSink(object):
+    """Writes each record to a text file as a line of JSON."""
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, record):
+        self.file.write(json.dumps(record, sort_keys=True))
+        self.file.write('\n')
+
+
+class CSVSink(object):
+    """
+    Writes records to a CSV file (opened with newline=''), one column per
+    field in `fields`, with a header row. Fields a record lacks are left
+    blank; lists and dicts are written as JSON.
+    """
+    def __init__(self, file, fields):
+        self.fields = list(fields)
+        self._writer = csv.writer(file)
+        self._writer.writerow(self.fields)
+
+    def write(self, record):
+        self._writer.writerow([_cell(record.get(field)) for field in self.fields])
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def to_record(item):
+    """The default transform: an object's data, or the item itself."""
+    if isinstance(item, APIObject):
+        return item.data
+    return item
+
+
+def export(paginated, sink, processes=None, pages_per_task=4, transform=to_record, config=None):
+    """
+    Write every item of `paginated` to `sink`, in order, passed through
+    `transform`. Pages are fetched and parsed `pages_per_task` at a time by
+    a pool of `processes` worker processes (by default, one per CPU), each
+    with a client built from `config` (by default, the configuration of the
+    list's client). Returns the number of items written.
+
+    Only a few tasks per process are in flight at a time, so memory use
+    doesn't grow with the length of the list. With a rate limit, what's left
+    of it after the first page is split evenly between the workers, and
+    there are never more workers than requests allowed per period.
+    """
+    if pages_per_task < 1:
+        raise ValueError('Each task needs at least one page')
+    if config is None:
+        config = ClientConfig.from_client(paginated.client)
+
+    # The first page tells how many there are; write it from here rather
+    # than fetching it again.
+    num_pages = paginated.pages
+    written = 0
+    for item in paginated.page(1):
+        sink.write(transform(item))
+        written += 1
+
+    tasks = [range(start, min(start + pages_per_task, num_pages + 1))
+             for start in range(2, num_pages + 1, pages_per_task)]
+    if not tasks:
+        return written
+
+    config, workers = _split_rate_limit(config, processes or multiprocessing.cpu_count())
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    # Keep a couple of tasks per worker in flight, and write the results in
+    # order as they complete.
+    futures = []
+    try:
+        for i in range(len(tasks)):
+            for j in range(len(futures), min(i + 2 * workers, len(tasks))):
+                futures.append(executor.submit(_export_pages, config, paginated, tasks[j], transform))
+            for record in futures[i].result():
+                sink.write(record)
+                written += 1
+            futures[i] = None
+    finally:
+        for future in futures:
+            if future is not None:
+                future.cancel()
+        executor.shutdown(wait=True)
+    return written
+
+
+def _split_rate_limit(config, workers):
+    """
+    Returns the config for each of `workers` workers, and how many of them
+    to start, so that together they stay within the config's rate limit.
+    """
+    if config.rate_limit is None:
+        return config, workers
+    # The first page was fetched from here, within the same period
+    limit, period = config.rate_limit
+    limit -= 1
+    if limit < 1:
+        raise ValueError('The rate limit leaves no requests for the workers')
+    workers = min(workers, limit)
+    config = copy.copy(config)
+    config.rate_limit = (limit // workers, period)
+    # Once the server reports the limit, each worker takes its share of it
+    config.rate_limit_share *= workers
+    return config, workers
+
+
+# The client a worker process built, by config key
+_worker_clients = {}
+
+
+def _export_pages(config, paginated, indices, transform):
+    client = _worker_clients.get(config.key)
+    if client is None:
+        _worker_clients.clear()
+        client = _worker_clients[config.key] = config.client()
+    paginated.client = client
+    records = []
+    for index in indices:
+        records.extend(transform(item) for item in paginated._fetch_page(index))
+    return records
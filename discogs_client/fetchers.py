@@ -1,16 +1,22 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import requests
-from requests.api import request
+from requests.adapters import HTTPAdapter
 from oauthlib import oauth1
+import base64
+import gzip
 import json
 import os
 import re
+import threading
+from collections import deque
 try:
     # python2
-    from urlparse import parse_qsl
+    from urlparse import parse_qsl, urlsplit
 except ImportError:
     # python3
-    from urllib.parse import parse_qsl
+    from urllib.parse import parse_qsl, urlsplit
+
+from discogs_client.utils import canonical_url
 
 
 class Fetcher(object):
@@ -27,15 +33,25 @@ class Fetcher(object):
         -------
         content : str (python2) or bytes (python3)
         status_code : int
+        headers : dict-like, optional
+            The response headers. Fetchers that have no headers to report
+            may return just (content, status_code).
         """
         raise NotImplementedError()
 
+    def close(self):
+        """Release any resources (e.g. pooled connections) held by the fetcher."""
+        pass
+
 
 class LoggingDelegator(object):
-    """Wraps a fetcher and logs all requests."""
-    def __init__(self, fetcher):
+    """
+    Wraps a fetcher and logs all requests, or only the last `maxlen` of
+    them.
+    """
+    def __init__(self, fetcher, maxlen=None):
         self.fetcher = fetcher
-        self.requests = []
+        self.requests = [] if maxlen is None else deque(maxlen=maxlen)
 
     @property
     def last_request(self):
@@ -45,28 +61,72 @@ class LoggingDelegator(object):
         self.requests.append((method, url, data, headers))
         return self.fetcher.fetch(client, method, url, data, headers, json)
 
+    def close(self):
+        self.fetcher.close()
+
+
+class SessionFetcher(Fetcher):
+    """
+    Base class for Fetchers that talk HTTP through a pooled requests.Session.
+
+    The session keeps connections alive between requests, so consecutive API
+    calls reuse the same TCP/TLS connection instead of performing a new
+    handshake each time.
 
-class RequestsFetcher(Fetcher):
+    pool_connections is the number of per-host connection pools to cache and
+    pool_maxsize the number of connections kept alive in each of them (raise
+    it when sharing a fetcher between many threads). max_retries is passed to
+    the transport adapters and may be an int or a urllib3 Retry instance.
+    timeout is a number of seconds or a (connect, read) tuple.
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, max_retries=0,
+                 timeout=None, session=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = session if session is not None else self._build_session()
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              max_retries=self.max_retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _send(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class RequestsFetcher(SessionFetcher):
     """Fetches via HTTP from the Discogs API."""
     def fetch(self, client, method, url, data=None, headers=None, json=True):
-        resp = requests.request(method, url, data=data, headers=headers)
-        return resp.content, resp.status_code
+        resp = self._send(method, url, data=data, headers=headers)
+        return resp.content, resp.status_code, resp.headers
 
 
-class UserTokenRequestsFetcher(Fetcher):
+class UserTokenRequestsFetcher(SessionFetcher):
     """Fetches via HTTP from the Discogs API using user_token authentication"""
-    def __init__(self, user_token):
+    def __init__(self, user_token, **kwargs):
+        super(UserTokenRequestsFetcher, self).__init__(**kwargs)
         self.user_token = user_token
 
     def fetch(self, client, method, url, data=None, headers=None, json=True):
-        resp = requests.request(method, url, params={'token':self.user_token},
-                                data=data, headers=headers)
-        return resp.content, resp.status_code
+        resp = self._send(method, url, params={'token': self.user_token},
+                          data=data, headers=headers)
+        return resp.content, resp.status_code, resp.headers
 
 
-class OAuth2Fetcher(Fetcher):
+class OAuth2Fetcher(SessionFetcher):
     """Fetches via HTTP + OAuth 1.0a from the Discogs API."""
-    def __init__(self, consumer_key, consumer_secret, token=None, secret=None):
+    def __init__(self, consumer_key, consumer_secret, token=None, secret=None, **kwargs):
+        super(OAuth2Fetcher, self).__init__(**kwargs)
         self.client = oauth1.Client(consumer_key, client_secret=consumer_secret)
         self.store_token(token, secret)
 
@@ -92,17 +152,19 @@ class OAuth2Fetcher(Fetcher):
         uri, headers, body = self.client.sign(url, http_method=method,
                                               body=data, headers=headers)
 
-        resp = request(method, uri, headers=headers, data=body)
-        return resp.content, resp.status_code
+        resp = self._send(method, uri, headers=headers, data=body)
+        return resp.content, resp.status_code, resp.headers
 
 
 class FilesystemFetcher(Fetcher):
     """Fetches from a directory of files."""
     default_response = json.dumps({'message': 'Resource not found.'}).encode('utf8'), 404
-    path_with_params = re.compile('(?P<dir>(\w+/)+)(?P<query>\w+)\?(?P<params>.*)')
+    path_with_params = re.compile(r'(?P<dir>(\w+/)+)(?P<query>\w+)\?(?P<params>.*)')
 
     def __init__(self, base_path):
         self.base_path = base_path
+        # (directory, query, ext) -> {frozenset of params: params string}
+        self._alternates = {}
 
     def fetch(self, client, method, url, data=None, headers=None, json=True):
         url = url.replace(client._base_url, '')
@@ -150,18 +212,30 @@ class FilesystemFetcher(Fetcher):
         params_str = match.group('params')[:-len(ext)]  # strip extension if any
         params = set(params_str.split('&'))
 
-        # List files that match the same query, possibly with different parameters
-        filenames = [f for f in os.listdir(base_dir) if f.startswith(query)]
-        for f in filenames:
-            # Strip the query, the '?' sign (or its replacement) and the extension, if any
-            params2_str = f[len(query) + 1:-len(ext)]
-            params2 = set(params2_str.split('&'))
-            if params == params2:
-                return base_name.replace(params_str, params2_str)
+        params2_str = self._alternate_params(base_dir, query, ext).get(frozenset(params))
+        if params2_str is not None:
+            return base_name.replace(params_str, params2_str)
 
         # No matching alternatives found - revert to original.
         return base_name
 
+    def _alternate_params(self, base_dir, query, ext):
+        """
+        Indexes the files in base_dir that match the same query by their
+        set of parameters, listing the directory once rather than per miss.
+        """
+        key = (base_dir, query, ext)
+        index = self._alternates.get(key)
+        if index is None:
+            index = {}
+            for f in os.listdir(base_dir):
+                if f.startswith(query):
+                    # Strip the query, the '?' sign (or its replacement) and the extension, if any
+                    params2_str = f[len(query) + 1:len(f) - len(ext)]
+                    index.setdefault(frozenset(params2_str.split('&')), params2_str)
+            self._alternates[key] = index
+        return index
+
 
 class MemoryFetcher(Fetcher):
     """Fetches from a dict of URL -> (content, status_code)."""
@@ -172,3 +246,115 @@ class MemoryFetcher(Fetcher):
 
     def fetch(self, client, method, url, data=None, headers=None, json=True):
         return self.responses.get(url, self.default_response)
+
+
+class CassetteFetcher(Fetcher):
+    """
+    Records the responses of another fetcher to a cassette file, and replays
+    them from it.
+
+    Requests are matched by method, URL and body, ignoring the host and the
+    order of query parameters, with a dict lookup. The cassette is a gzipped JSON
+    file holding each response's body, status code and headers; it's read
+    in full when the fetcher is created, and written by save() or close().
+
+    `mode` is one of:
+
+    - 'replay': only serve recorded responses. Anything else gets a 404,
+      and its URL is added to `misses`.
+    - 'record': send every request through `fetcher` and record the
+      responses, replacing those recorded before.
+    - 'new': serve recorded responses, and record the responses to other
+      requests through `fetcher`.
+    """
+    default_response = json.dumps({'message': 'Resource not found.'}).encode('utf8'), 404
+    modes = ('replay', 'record', 'new')
+
+    def __init__(self, path, fetcher=None, mode='replay'):
+        if mode not in self.modes:
+            raise ValueError('mode must be one of {0}'.format(', '.join(self.modes)))
+        if mode != 'replay' and fetcher is None:
+            raise ValueError('A fetcher is needed to record responses')
+        self.path = path
+        self.fetcher = fetcher
+        self.mode = mode
+        self.misses = []
+        self._responses = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self._responses)
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        key = _cassette_key(method, url, data)
+        if self.mode != 'record':
+            response = self._responses.get(key)
+            if response is not None:
+                return response
+            if self.mode == 'replay':
+                with self._lock:
+                    self.misses.append(url)
+                return self.default_response
+
+        result = self.fetcher.fetch(client, method, url, data, headers, json)
+        content, status_code = result[:2]
+        response_headers = dict(result[2]) if len(result) > 2 and result[2] else {}
+        with self._lock:
+            self._responses[key] = (content, status_code, response_headers)
+            self._dirty = True
+        return content, status_code, response_headers
+
+    def _load(self):
+        with gzip.open(self.path, 'rb') as f:
+            cassette = json.loads(f.read().decode('utf8'))
+        for interaction in cassette['interactions']:
+            if 'body' in interaction:
+                content = interaction['body'].encode('utf8')
+            else:
+                content = base64.b64decode(interaction['body_base64'])
+            key = (interaction['method'], interaction['url'], interaction.get('request_body', ''))
+            self._responses[key] = (content, interaction['status_code'], interaction['headers'])
+
+    def save(self):
+        """Write the cassette, if anything was recorded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            interactions = []
+            for (method, url, body), (content, status_code, headers) in sorted(self._responses.items()):
+                interaction = {'method': method, 'url': url, 'status_code': status_code, 'headers': headers}
+                if body:
+                    interaction['request_body'] = body
+                try:
+                    interaction['body'] = content.decode('utf8')
+                except UnicodeDecodeError:
+                    interaction['body_base64'] = base64.b64encode(content).decode('ascii')
+                interactions.append(interaction)
+            with gzip.open(self.path, 'wb') as f:
+                f.write(json.dumps({'version': 1, 'interactions': interactions}).encode('utf8'))
+            self._dirty = False
+
+    def close(self):
+        self.save()
+        if self.fetcher is not None:
+            self.fetcher.close()
+
+
+def _cassette_key(method, url, data=None):
+    """
+    (method, path and canonical query, body), leaving out the scheme and
+    host. A dict body is serialized with sorted keys.
+    """
+    parts = urlsplit(canonical_url(url))
+    if not data:
+        body = ''
+    elif isinstance(data, dict):
+        body = json.dumps(data, sort_keys=True)
+    elif isinstance(data, bytes):
+        body = data.decode('utf8', 'replace')
+    else:
+        body = data
+    return method, parts.path + ('?' + parts.query if parts.query else ''), body
@@ -0,0 +1,200 @@
+"""
+Instrumentation for the requests a client makes.
+
+Every Client has a `hooks` registry. Listeners are told about each API
+request three ways, all with a RequestEvent:
+
+- before_request, before it's sent;
+- after_response, once a response has come back (including 4xx/5xx ones),
+  with its status, size and latency;
+- on_error, when the request ends in an exception (an HTTPError for an
+  error status, or whatever the fetcher raised).
+
+    def log_slow(event):
+        if event.latency > 1:
+            print(event.method, event.endpoint, event.latency)
+
+    client.hooks.register('after_response', log_slow)
+
+Metrics is a listener that aggregates counters and latency histograms per
+endpoint:
+
+    metrics = client.hooks.add(Metrics())
+    ...
+    print(metrics.to_prometheus())
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import bisect
+import threading
+from timeit import default_timer
+
+from discogs_client.utils import url_template
+
+
+EVENTS = ('before_request', 'after_response', 'on_error')
+
+
+class RequestEvent(object):
+    """
+    A request, as reported to hooks. `endpoint` is the URL template, e.g.
+    '/releases/{id}'. `status_code`, `bytes` and `latency` (seconds) are set
+    once a response has come back, and `error` if the request failed.
+    `retries` counts the attempts repeated after a 429 or a transient error,
+    and `backoff` the seconds spent waiting to retry transient errors.
+    """
+    __slots__ = ('method', 'url', 'endpoint', 'status_code', 'bytes', 'latency',
+                 'retries', 'backoff', 'error', 'started')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.endpoint = url_template(url)
+        self.status_code = None
+        self.bytes = None
+        self.latency = None
+        self.retries = 0
+        self.backoff = 0.0
+        self.error = None
+        self.started = default_timer()
+
+    def _finish(self):
+        self.latency = default_timer() - self.started
+
+    def __repr__(self):
+        return '<RequestEvent {0} {1} {2!r}>'.format(self.method, self.endpoint, self.status_code)
+
+
+class Hooks(object):
+    """A registry of functions called on request events."""
+    def __init__(self):
+        self._handlers = dict((event, []) for event in EVENTS)
+        self._listeners = []
+
+    def __bool__(self):
+        return bool(self._listeners)
+
+    __nonzero__ = __bool__
+
+    def register(self, event, handler):
+        """Call handler(request_event) on `event` (one of EVENTS)."""
+        if event not in self._handlers:
+            raise ValueError('Unknown event: {0!r}'.format(event))
+        self._handlers[event].append(handler)
+        self._listeners.append(handler)
+        return handler
+
+    def unregister(self, event, handler):
+        self._handlers[event].remove(handler)
+        self._listeners.remove(handler)
+
+    def add(self, listener):
+        """Register the methods of `listener` named after events."""
+        for event in EVENTS:
+            handler = getattr(listener, event, None)
+            if handler is not None:
+                self.register(event, handler)
+        return listener
+
+    def remove(self, listener):
+        for event in EVENTS:
+            handler = getattr(listener, event, None)
+            if handler is not None and handler in self._handlers[event]:
+                self.unregister(event, handler)
+
+    def emit(self, event, request_event):
+        for handler in self._handlers[event]:
+            handler(request_event)
+
+
+class Metrics(object):
+    """
+    Aggregates requests per method and endpoint: counts by status, errors,
+    bytes received, retries, and a histogram of latencies with the given
+    bucket bounds (in seconds). Thread-safe.
+    """
+    default_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(sorted(buckets or self.default_buckets))
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _stat(self, event):
+        key = (event.method, event.endpoint)
+        stat = self._stats.get(key)
+        if stat is None:
+            stat = self._stats[key] = {
+                'requests': 0,
+                'errors': 0,
+                'statuses': {},
+                'bytes': 0,
+                'retries': 0,
+                'backoff': 0.0,
+                'latency_sum': 0.0,
+                # The last bucket counts latencies over the largest bound
+                'latency_buckets': [0] * (len(self.buckets) + 1),
+            }
+        return stat
+
+    def after_response(self, event):
+        with self._lock:
+            stat = self._stat(event)
+            stat['requests'] += 1
+            stat['statuses'][event.status_code] = stat['statuses'].get(event.status_code, 0) + 1
+            stat['bytes'] += event.bytes or 0
+            stat['retries'] += event.retries
+            stat['backoff'] += event.backoff
+            stat['latency_sum'] += event.latency
+            stat['latency_buckets'][bisect.bisect_left(self.buckets, event.latency)] += 1
+
+    def on_error(self, event):
+        with self._lock:
+            stat = self._stat(event)
+            stat['errors'] += 1
+            if event.status_code is None:
+                # No response, so after_response didn't count it
+                stat['requests'] += 1
+                stat['retries'] += event.retries
+                stat['backoff'] += event.backoff
+
+    def snapshot(self):
+        """Returns {(method, endpoint): stats}, a copy of the current numbers."""
+        with self._lock:
+            return dict(
+                (key, dict(stat, statuses=dict(stat['statuses']),
+                           latency_buckets=list(stat['latency_buckets'])))
+                for key, stat in self._stats.items()
+            )
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self, prefix='discogs_client'):
+        """Renders the numbers in the Prometheus text exposition format."""
+        lines = [
+            '# TYPE {0}_requests_total counter'.format(prefix),
+            '# TYPE {0}_errors_total counter'.format(prefix),
+            '# TYPE {0}_response_bytes_total counter'.format(prefix),
+            '# TYPE {0}_retries_total counter'.format(prefix),
+            '# TYPE {0}_backoff_seconds_total counter'.format(prefix),
+            '# TYPE {0}_request_duration_seconds histogram'.format(prefix),
+        ]
+        for (method, endpoint), stat in sorted(self.snapshot().items()):
+            labels = 'method="{0}",endpoint="{1}"'.format(method, endpoint)
+            for status, count in sorted(stat['statuses'].items()):
+                lines.append('{0}_requests_total{{{1},status="{2}"}} {3}'.format(prefix, labels, status, count))
+            lines.append('{0}_errors_total{{{1}}} {2}'.format(prefix, labels, stat['errors']))
+            lines.append('{0}_response_bytes_total{{{1}}} {2}'.format(prefix, labels, stat['bytes']))
+            lines.append('{0}_retries_total{{{1}}} {2}'.format(prefix, labels, stat['retries']))
+            lines.append('{0}_backoff_seconds_total{{{1}}} {2!r}'.format(prefix, labels, stat['backoff']))
+            cumulative = 0
+            bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, stat['latency_buckets']):
+                cumulative += count
+                lines.append('{0}_request_duration_seconds_bucket{{{1},le="{2}"}} {3}'.format(
+                    prefix, labels, bound, cumulative))
+            lines.append('{0}_request_duration_seconds_sum{{{1}}} {2!r}'.format(prefix, labels, stat['latency_sum']))
+            lines.append('{0}_request_duration_seconds_count{{{1}}} {2}'.format(prefix, labels, cumulative))
+        return '\n'.join(lines) + '\n'
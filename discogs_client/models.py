@@ -1,18 +1,68 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 import sys
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from six import with_metaclass
+from six import with_metaclass, string_types, text_type
 
 from discogs_client.exceptions import HTTPError
-from discogs_client.utils import parse_timestamp, update_qs, omit_none
+from discogs_client.utils import parse_timestamp, build_url, omit_none, url_template
 
 
-class SimpleFieldDescriptor(object):
+# Objects are too many to give each a lock of its own, so they share these,
+# picked by address. They're only held for as long as it takes to swap in new
+# data, never while making a request.
+_OBJECT_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _lock_for(obj):
+    return _OBJECT_LOCKS[(id(obj) >> 4) % len(_OBJECT_LOCKS)]
+
+
+class MemoizedFieldDescriptor(object):
+    """
+    Base class for descriptors whose value is built once per object, by
+    _build(), and kept until the object is refreshed or changed.
+    """
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        values = instance._field_values
+        if values is not None:
+            try:
+                return values[self]
+            except KeyError:
+                pass
+        # Building the value may refresh the object, which resets the memo.
+        # So may another thread at any time: only keep the value if it was
+        # built from the data the object still has, building it again once
+        # from the new data if needed.
+        data = instance.data
+        value = self._build(instance)
+        if instance.data is not data:
+            data = instance.data
+            value = self._build(instance)
+            if instance.data is not data:
+                return value
+        values = instance._field_values
+        if values is None:
+            values = instance._field_values = {}
+        values[self] = value
+        return value
+
+    def _build(self, instance):
+        raise NotImplementedError()
+
+
+class SimpleFieldDescriptor(MemoizedFieldDescriptor):
     """
     An attribute that determines its value using the object's fetch() method.
 
     If transform is a callable, the value will be passed through transform when
-    read. Useful for strings that should be ints, parsing timestamps, etc.
+    read. Useful for strings that should be ints, parsing timestamps, etc. The
+    transformed value is memoized until the object is refreshed or changed.
 
     Shorthand for:
 
@@ -26,21 +76,24 @@ class SimpleFieldDescriptor(object):
         self.transform = transform
 
     def __get__(self, instance, owner):
-        if instance is None:
-            return self
-        value = instance.fetch(self.name)
-        if self.transform:
-            value = self.transform(value)
-        return value
+        if instance is not None and not self.transform:
+            return instance.fetch(self.name)
+        return super(SimpleFieldDescriptor, self).__get__(instance, owner)
+
+    def _build(self, instance):
+        return self.transform(instance.fetch(self.name))
 
     def __set__(self, instance, value):
         if self.writable:
             instance.changes[self.name] = value
+            values = instance._field_values
+            if values:
+                values.pop(self, None)
             return
         raise AttributeError("can't set attribute")
 
 
-class ObjectFieldDescriptor(object):
+class ObjectFieldDescriptor(MemoizedFieldDescriptor):
     """
     An attribute that determines its value using the object's fetch() method,
     and passes the resulting value through an APIObject.
@@ -51,6 +104,8 @@ class ObjectFieldDescriptor(object):
     If as_id = True, the value is treated as an ID for the new APIObject rather
     than a partial dict of the APIObject.
 
+    The APIObject is memoized until the object is refreshed.
+
     Shorthand for:
 
         @property
@@ -62,27 +117,28 @@ class ObjectFieldDescriptor(object):
         self.class_name = class_name
         self.optional = optional
         self.as_id = as_id
+        self._wrapper_class = None
 
-    def __get__(self, instance, owner):
-        if instance is None:
-            return self
-        wrapper_class = CLASS_MAP[self.class_name.lower()]
+    def _build(self, instance):
+        if self._wrapper_class is None:
+            self._wrapper_class = CLASS_MAP[self.class_name.lower()]
         response_dict = instance.fetch(self.name)
         if self.optional and not response_dict:
             return None
         if self.as_id:
             # Response_dict wasn't really a dict. Make it so.
             response_dict = {'id': response_dict}
-        return wrapper_class(instance.client, response_dict)
+        return wrap(instance.client, self._wrapper_class, response_dict)
 
     def __set__(self, instance, value):
         raise AttributeError("can't set attribute")
 
 
-class ListFieldDescriptor(object):
+class ListFieldDescriptor(MemoizedFieldDescriptor):
     """
     An attribute that determines its value using the object's fetch() method,
-    and passes each item in the resulting list through an APIObject.
+    and passes each item in the resulting list through an APIObject. The list
+    is memoized until the object is refreshed.
 
     Shorthand for:
 
@@ -93,12 +149,12 @@ class ListFieldDescriptor(object):
     def __init__(self, name, class_name):
         self.name = name
         self.class_name = class_name
+        self._wrapper_class = None
 
-    def __get__(self, instance, owner):
-        if instance is None:
-            return self
-        wrapper_class = CLASS_MAP[self.class_name.lower()]
-        return [wrapper_class(instance.client, d) for d in instance.fetch(self.name, [])]
+    def _build(self, instance):
+        if self._wrapper_class is None:
+            self._wrapper_class = CLASS_MAP[self.class_name.lower()]
+        return [wrap(instance.client, self._wrapper_class, d) for d in instance.fetch(self.name, [])]
 
     def __set__(self, instance, value):
         raise AttributeError("can't set attribute")
@@ -127,12 +183,14 @@ class ObjectCollectionDescriptor(object):
         if list_class is None:
             list_class = PaginatedList
         self.list_class = list_class
+        self._wrapper_class = None
 
     def __get__(self, instance, owner):
         if instance is None:
             return self
-        wrapper_class = CLASS_MAP[self.class_name.lower()]
-        return self.list_class(instance.client, instance.fetch(self.url_key), self.name, wrapper_class)
+        if self._wrapper_class is None:
+            self._wrapper_class = CLASS_MAP[self.class_name.lower()]
+        return self.list_class(instance.client, instance.fetch(self.url_key), self.name, self._wrapper_class)
 
     def __set__(self, instance, value):
         raise AttributeError("can't set attribute")
@@ -175,10 +233,18 @@ class ObjectCollection(Field):
 
 
 class APIObjectMeta(type):
+    """
+    Turns Fields into descriptors, and gives the APIObject classes of this
+    module empty __slots__ unless they declare their own, so that their
+    instances don't carry a __dict__. Subclasses defined elsewhere keep
+    theirs, and can set attributes of their own as before.
+    """
     def __new__(cls, name, bases, dict_):
         for k, v in dict_.items():
             if isinstance(v, Field):
                 dict_[k] = v.to_descriptor(k)
+        if dict_.get('__module__') == __name__:
+            dict_.setdefault('__slots__', ())
         return super(APIObjectMeta, cls).__new__(cls, name, bases, dict_)
 
 
@@ -191,11 +257,39 @@ class APIObject(with_metaclass(APIObjectMeta, object)):
 
 class PrimaryAPIObject(APIObject):
     """A first-order API object that has a canonical endpoint of its own."""
+    # The key identifying the resource, for classes whose instances may be
+    # shared through the client's identity map.
+    _identity_key = None
+    # Keys describing the resource's place where it's listed (e.g. an
+    # artist's role on a release) rather than the resource itself, which
+    # its shared instance is built and merged without.
+    _context_keys = frozenset()
+
+    __slots__ = ('data', 'client', '_changes', '_known_invalid_keys',
+                 '_field_values', '_complete', '__weakref__')
+
     def __init__(self, client, dict_):
         self.data = dict_
         self.client = client
-        self._known_invalid_keys = []
-        self.changes = {}
+        # Most objects are never changed and never miss a key, so these are
+        # only allocated when needed.
+        self._changes = None
+        self._known_invalid_keys = None
+        self._field_values = None
+        # Set once a refresh has loaded the full representation, so that
+        # missing keys don't trigger another one.
+        self._complete = False
+
+    @property
+    def changes(self):
+        changes = self._changes
+        if changes is None:
+            changes = self._changes = {}
+        return changes
+
+    @changes.setter
+    def changes(self, value):
+        self._changes = value
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -208,14 +302,94 @@ class PrimaryAPIObject(APIObject):
 
     def refresh(self):
         if self.data.get('resource_url'):
-            data = self.client._get(self.data['resource_url'])
-            self.data.update(data)
-            self.changes = {}
+            self._loaded(self.client._get(self.data['resource_url']))
+
+    def _loaded(self, data):
+        # The object's full data, fetched by refresh()
+        self._update(data)
+        self._complete = True
+
+    def _update(self, data):
+        # Copy on write: threads reading the object keep seeing a complete
+        # dict, either the old one or the new one.
+        with _lock_for(self):
+            new_data = dict(self.data)
+            new_data.update(data)
+            self.data = new_data
+            self._changes = None
+            self._field_values = None
+
+    def _merge(self, dict_):
+        """Fill in keys from another partial representation of this resource."""
+        keys = [key for key in dict_ if key not in self.data and key not in self._context_keys]
+        if not keys:
+            return
+        with _lock_for(self):
+            new_data = dict(self.data)
+            for key in keys:
+                new_data.setdefault(key, dict_[key])
+            self.data = new_data
+            self._field_values = None
+
+    def _invalid_keys(self, create=False):
+        """
+        Returns the set of keys the full representation of this resource is
+        known to lack, shared with the other instances of the resource through
+        the client's MissingKeys (or None if there's none yet).
+        """
+        keys = self._known_invalid_keys
+        if keys is None:
+            with _lock_for(self):
+                keys = self._known_invalid_keys
+                if keys is None:
+                    missing_keys = getattr(self.client, 'missing_keys', None)
+                    if missing_keys is not None:
+                        keys = missing_keys.get(self, create)
+                    elif create:
+                        keys = set()
+                    self._known_invalid_keys = keys
+        return keys
+
+    def _add_invalid_key(self, key):
+        # Adding to a set is atomic, so this needs no lock of its own
+        self._invalid_keys(create=True).add(key)
+
+    def ensure(self, *fields):
+        """
+        Make sure the given fields (attribute names, e.g. 'real_name') are
+        loaded, refreshing the object once up front if any of them is missing
+        rather than on whichever access happens to miss first. Returns the
+        object.
+        """
+        missing = self._missing_keys(field_keys(self.__class__, fields))
+        if missing and not self._complete:
+            self.refresh()
+            for key in self._missing_keys(missing):
+                self._add_invalid_key(key)
+        return self
 
-    def save(self):
+    def _missing_keys(self, keys):
+        invalid_keys = self._invalid_keys() or ()
+        return [key for key in keys if key not in self.data and key not in invalid_keys]
+
+    def refresh_async(self):
+        """Awaitable version of refresh(), for objects from an AsyncClient."""
+        return self.client._refresh_async(self)
+
+    def save_async(self):
+        """Awaitable version of save(), for objects from an AsyncClient."""
+        return self.client._save_async(self)
+
+    def _save_request(self):
+        # The (method, url, data) of the request saving the changes, if any
         if self.data.get('resource_url'):
             # TODO: This should be PATCH
-            self.client._post(self.data['resource_url'], self.changes)
+            return 'POST', self.data['resource_url'], self.changes
+
+    def save(self):
+        request = self._save_request()
+        if request is not None:
+            self.client._request(*request)
 
             # Refresh the object, in case there were side-effects
             self.refresh()
@@ -225,14 +399,12 @@ class PrimaryAPIObject(APIObject):
             self.client._delete(self.data['resource_url'])
 
     def fetch(self, key, default=None):
-        if key in self._known_invalid_keys:
-            return default
-
-        try:
-            # First, look in the cache of pending changes
-            return self.changes[key]
-        except KeyError:
-            pass
+        if self._changes:
+            try:
+                # First, look in the cache of pending changes
+                return self._changes[key]
+            except KeyError:
+                pass
 
         try:
             # Next, look in the potentially incomplete local cache
@@ -240,14 +412,29 @@ class PrimaryAPIObject(APIObject):
         except KeyError:
             pass
 
+        invalid_keys = self._invalid_keys()
+        if invalid_keys and key in invalid_keys:
+            return default
+
+        if self._complete:
+            # Another thread may have completed the object since we looked
+            data = self.data
+            if key in data:
+                return data[key]
+            self._add_invalid_key(key)
+            return default
+
         # Now refresh the object from its resource_url.
         # The key might exist but not be in our cache.
+        audit = getattr(self.client, 'refresh_audit', None)
+        if audit is not None and self.data.get('resource_url'):
+            audit.record(self, key)
         self.refresh()
 
         try:
             return self.data[key]
         except:
-            self._known_invalid_keys.append(key)
+            self._add_invalid_key(key)
             return default
 
 
@@ -257,27 +444,180 @@ class SecondaryAPIObject(APIObject):
     An object that wraps parts of a response and doesn't have its own
     endpoint.
     """
+    __slots__ = ('client', 'data', '_field_values')
+
     def __init__(self, client, dict_):
         self.client = client
         self.data = dict_
+        self._field_values = None
 
     def fetch(self, key, default=None):
         return self.data.get(key, default)
 
 
+class IdentityMap(object):
+    """
+    Hands out a single shared instance per resource, keyed by class and ID,
+    so that data loaded through one reference is seen by all of them.
+    Instances are held weakly and forgotten once nothing else refers to them.
+
+    Shared instances leave out their class's _context_keys, which differ
+    from one listing to the next (e.g. an artist's role on each release);
+    those stay in the data of the object listing them.
+    """
+    def __init__(self):
+        self._objects = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def get(self, client, class_, dict_):
+        key = (class_, text_type(dict_[class_._identity_key]))
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None:
+                context_keys = class_._context_keys
+                if any(k in context_keys for k in dict_):
+                    dict_ = dict((k, v) for k, v in dict_.items() if k not in context_keys)
+                obj = class_(client, dict_)
+                self._objects[key] = obj
+                return obj
+        obj._merge(dict_)
+        return obj
+
+
+class MissingKeys(object):
+    """
+    Remembers the keys found missing from the full representation of each
+    resource, keyed by class and ID, so that other instances of the same
+    resource can skip the refresh that would only find out again. Only the
+    `max_entries` most recently used resources are remembered.
+    """
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, obj, create=False):
+        """
+        Returns the shared set of keys obj's resource lacks, creating it if
+        `create`. Objects that can't be identified get a set of their own.
+        """
+        identity = obj._identity_key and obj.data.get(obj._identity_key)
+        if identity is None:
+            return set() if create else None
+        key = (obj.__class__, text_type(identity))
+        with self._lock:
+            keys = self._keys.pop(key, None)
+            if keys is None and create:
+                keys = set()
+            if keys is not None:
+                # Mark it as the most recently used
+                self._keys[key] = keys
+                while len(self._keys) > self.max_entries:
+                    self._keys.popitem(last=False)
+        return keys
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+def field_keys(class_, fields):
+    """Maps attribute names of class_ to the keys they read, e.g. 'real_name' -> 'realname'."""
+    keys = []
+    for field in fields:
+        descriptor = getattr(class_, field, None)
+        key = getattr(descriptor, 'url_key', None) or getattr(descriptor, 'name', None)
+        keys.append(key if isinstance(key, string_types) else field)
+    return keys
+
+
+class PartialFields(object):
+    """
+    Records which keys the items of each list endpoint come with, by
+    endpoint (e.g. '/database/search') and item class. Those keys can be read
+    from the listed objects without refreshing them.
+    """
+    def __init__(self):
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def record(self, url, objects):
+        endpoint = url_template(url)
+        with self._lock:
+            for obj in objects:
+                data = getattr(obj, 'data', None)
+                if data is None:
+                    continue
+                key = (endpoint, obj.__class__.__name__)
+                known = self._keys.get(key)
+                self._keys[key] = frozenset(data) if known is None else known.intersection(data)
+
+    def get(self, url, class_):
+        """Returns the keys every item of class_ listed at url came with, or None if unknown."""
+        return self._keys.get((url_template(url), class_.__name__))
+
+
+def wrap(client, class_, dict_):
+    """
+    Returns class_(client, dict_), or the shared instance of that resource if
+    the client keeps an identity map.
+    """
+    identity_map = getattr(client, '_identity_map', None)
+    if identity_map is None or getattr(class_, '_identity_key', None) is None \
+            or dict_.get(class_._identity_key) is None:
+        return class_(client, dict_)
+    return identity_map.get(client, class_, dict_)
+
+
 class BasePaginatedResponse(object):
-    """Base class for lists of objects spread across many URLs."""
+    """
+    Base class for lists of objects spread across many URLs.
+
+    A list may be read from several threads at once: its pages and counts
+    are guarded by a lock of its own, which isn't held while fetching.
+    Reading a list never changes its page size; changing how it's sorted,
+    filtered or paged while other threads read it isn't supported.
+    """
+    # The largest page size the API allows
+    _max_per_page = 100
+
     def __init__(self, client, url):
         self.client = client
         self.url = url
         self._num_pages = None
         self._num_items = None
-        self._pages = {}
+        self._pages = OrderedDict()
+        self._max_pages = None
         self._per_page = 50
+        # Whether take() may fetch bigger pages; not once per_page is set
+        self._auto_per_page = True
         self._list_key = 'items'
         self._sort_key = None
         self._sort_order = 'asc'
         self._filters = {}
+        self._prefetch = 0
+        self._fields = ()
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        # Lists are pickled without their client, lock and pages, e.g. to be
+        # sent to the worker processes of discogs_client.export, which give
+        # them a client of their own.
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['client'] = None
+        state['_pages'] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
 
     @property
     def per_page(self):
@@ -286,25 +626,31 @@ class BasePaginatedResponse(object):
     @per_page.setter
     def per_page(self, value):
         self._per_page = value
+        self._auto_per_page = False
         self._invalidate()
 
     def _invalidate(self):
-        self._pages = {}
-        self._num_pages = None
-        self._num_items = None
+        with self._lock:
+            self._pages = OrderedDict()
+            self._num_pages = None
+            self._num_items = None
 
     def _load_pagination_info(self):
         data = self.client._get(self._url_for_page(1))
-        self._pages[1] = [
-            self._transform(item) for item in data[self._list_key]
-        ]
-        self._num_pages = data['pagination']['pages']
-        self._num_items = data['pagination']['items']
+        page = self._ensure_fields(self._parse_page(data))
+        with self._lock:
+            self._store_page(1, page)
+            self._update_pagination_info(data)
+
+    def _update_pagination_info(self, data):
+        with self._lock:
+            self._num_pages = data['pagination']['pages']
+            self._num_items = data['pagination']['items']
 
-    def _url_for_page(self, page):
+    def _url_for_page(self, page, per_page=None):
         base_qs = {
             'page': page,
-            'per_page': self._per_page,
+            'per_page': per_page or self._per_page,
         }
 
         if self._sort_key is not None:
@@ -315,7 +661,7 @@ class BasePaginatedResponse(object):
 
         base_qs.update(self._filters)
 
-        return update_qs(self.url, base_qs)
+        return build_url(self.url, params=base_qs)
 
     def sort(self, key, order='asc'):
         if order not in ('asc', 'desc'):
@@ -330,32 +676,144 @@ class BasePaginatedResponse(object):
         self._invalidate()
         return self
 
+    def ensure(self, *fields):
+        """
+        Make sure every item has the given fields (attribute names, e.g.
+        'country'). As each page is loaded, the items whose partial
+        representation lacks any of them are refreshed together, in parallel,
+        instead of one by one as they're read. Fields an item's class doesn't
+        have are ignored for that item.
+
+        An item that fails to refresh doesn't fail its page: it's left as it
+        was, and reading one of its missing fields refreshes it again (and
+        raises the error if it fails again).
+
+        The keys the list's items come with are recorded in the client's
+        partial_fields.
+        """
+        self._fields = fields
+        self._invalidate()
+        return self
+
+    def _ensure_fields(self, items):
+        if not self._fields:
+            return items
+        missing = []
+        for item in items:
+            if not isinstance(item, PrimaryAPIObject):
+                continue
+            fields = [f for f in self._fields if hasattr(item.__class__, f)]
+            if item._missing_keys(field_keys(item.__class__, fields)):
+                missing.append(item)
+        # Items that failed are refreshed again when their fields are read
+        for item, error in self.client._refresh_many(missing):
+            pass
+        return items
+
+    def prefetch(self, pages):
+        """
+        While iterating, fetch up to `pages` pages ahead on a thread pool.
+        Items are still yielded in order. Requests made by the pool go through
+        the client like any other, so they respect its rate limiter.
+        """
+        if pages < 0:
+            raise ValueError('Cannot prefetch a negative number of pages')
+        self._prefetch = pages
+        return self
+
+    def stream(self, max_pages=1):
+        """
+        Keep at most `max_pages` pages in memory, dropping the least recently
+        used ones, instead of every page ever fetched. Iterating over a long
+        list then holds onto a bounded number of items; random access to
+        items on dropped pages fetches them again.
+        """
+        if max_pages < 0:
+            raise ValueError('Cannot keep a negative number of pages')
+        self._max_pages = max_pages
+        self._evict_pages()
+        return self
+
+    def iter_stream(self):
+        """
+        Iterate over the items without keeping the pages fetched along the
+        way, whatever the list's own page cache holds.
+        """
+        for page in self._iter_pages(keep=False):
+            for item in page:
+                yield item
+
+    def _store_page(self, index, page):
+        with self._lock:
+            self._pages[index] = page
+            self._evict_pages()
+
+    def _evict_pages(self):
+        with self._lock:
+            if self._max_pages is not None:
+                while len(self._pages) > self._max_pages:
+                    self._pages.popitem(last=False)
+
     @property
     def pages(self):
-        if self._num_pages is None:
+        num_pages = self._num_pages
+        if num_pages is None:
             self._load_pagination_info()
-        return self._num_pages
+            num_pages = self._num_pages
+        return num_pages
 
     @property
     def count(self):
-        if self._num_items is None:
+        num_items = self._num_items
+        if num_items is None:
             self._load_pagination_info()
-        return self._num_items
+            num_items = self._num_items
+        return num_items
 
     def page(self, index):
-        if index not in self._pages:
-            data = self.client._get(self._url_for_page(index))
-            self._pages[index] = [
-                self._transform(item) for item in data[self._list_key]
-            ]
-        return self._pages[index]
+        with self._lock:
+            page = self._pages.get(index)
+            if page is not None:
+                if self._max_pages is not None:
+                    # Mark it as the most recently used
+                    self._pages[index] = self._pages.pop(index)
+                return page
+        page = self._fetch_page(index)
+        self._store_page(index, page)
+        return page
+
+    def _fetch_page(self, index, per_page=None):
+        url = self._url_for_page(index, per_page)
+        return self._ensure_fields(self._parse_page(self.client._get(url)))
+
+    def _parse_page(self, data):
+        items = [self._transform(item) for item in data[self._list_key]]
+        partial_fields = getattr(self.client, 'partial_fields', None)
+        if self._fields and partial_fields is not None:
+            partial_fields.record(self.url, items)
+        return items
+
+    def page_async(self, index):
+        """Awaitable version of page(), for lists from an AsyncClient."""
+        return self.client._page_async(self, index)
+
+    def __aiter__(self):
+        return self.client._iter_async(self)
 
     def _transform(self, item):
         return item
 
     def __getitem__(self, index):
-        page_index = index // self.per_page + 1
-        offset = index % self.per_page
+        if isinstance(index, slice):
+            return self._slice(index)
+
+        if index < 0:
+            index += self.count
+            if index < 0:
+                raise IndexError('list index out of range')
+
+        page_index = index // self._per_page + 1
+        offset = index % self._per_page
 
         try:
             page = self.page(page_index)
@@ -367,15 +825,130 @@ class BasePaginatedResponse(object):
 
         return page[offset]
 
+    def _slice(self, index):
+        start, stop, step = index.start, index.stop, index.step
+        if step is None and (start is None or start >= 0) and stop is not None and stop >= 0:
+            # A forward range, which take() clips to the list's length
+            return self.take(start or 0, stop - (start or 0))
+        indices = range(*index.indices(self.count))
+        if not indices:
+            return []
+        low, high = min(indices), max(indices)
+        items = self.take(low, high - low + 1)
+        return [items[i - low] for i in indices if i - low < len(items)]
+
+    def take(self, start, n):
+        """
+        Return a list of up to n items, starting at index `start` (which may
+        be negative). Only the pages holding them that aren't loaded yet are
+        fetched, in parallel if prefetch() is enabled. Unless per_page has
+        been set, a range that takes fewer requests with the largest page
+        size is fetched with it, for this call only: the list keeps its page
+        size and the pages it has.
+        """
+        if n <= 0:
+            return []
+        count = self.count
+        if start < 0:
+            start = max(start + count, 0)
+        end = min(start + n, count)
+        if start >= end:
+            return []
+
+        per_page = self._per_page
+        indices = _page_range(start, end, per_page)
+        with self._lock:
+            pages = dict((i, self._pages[i]) for i in indices if i in self._pages)
+        missing = [i for i in indices if i not in pages]
+
+        max_per_page = self._max_per_page
+        if self._auto_per_page and per_page < max_per_page and \
+                len(missing) > len(_page_range(start, end, max_per_page)):
+            pages = self._fetch_pages(_page_range(start, end, max_per_page), max_per_page)
+            return _items(pages, start, end, max_per_page)
+
+        for i, page in self._fetch_pages(missing, per_page).items():
+            self._store_page(i, page)
+            pages[i] = page
+        return _items(pages, start, end, per_page)
+
+    def _fetch_pages(self, indices, per_page):
+        """Returns a dict of the pages with the given indices, for pages of per_page items."""
+        if self._prefetch and len(indices) > 1:
+            executor = ThreadPoolExecutor(max_workers=self._prefetch)
+            try:
+                return dict(zip(indices, executor.map(lambda i: self._fetch_page(i, per_page), indices)))
+            finally:
+                executor.shutdown(wait=False)
+        return dict((i, self._fetch_page(i, per_page)) for i in indices)
+
     def __len__(self):
         return self.count
 
     def __iter__(self):
-        for i in range(1, self.pages + 1):
-            page = self.page(i)
+        for page in self._iter_pages():
             for item in page:
                 yield item
 
+    def _iter_pages(self, keep=True):
+        with self._lock:
+            cached = set(self._pages)
+        num_pages = self.pages
+        # Pages fetched by this iteration that aren't to be kept, such as the
+        # first page if loading the pagination info just fetched it
+        loaded = {}
+        if not keep:
+            with self._lock:
+                for i in set(self._pages) - cached:
+                    loaded[i] = self._pages.pop(i)
+
+        def get_page(i, fetched=None):
+            if i in loaded:
+                return loaded.pop(i)
+            if keep:
+                if fetched is not None:
+                    self._store_page(i, fetched)
+                    return fetched
+                return self.page(i)
+            if fetched is not None:
+                return fetched
+            page = self._pages.get(i)
+            return page if page is not None else self._fetch_page(i)
+
+        if not self._prefetch or num_pages < 2:
+            for i in range(1, num_pages + 1):
+                yield get_page(i)
+            return
+
+        # Keep the current page and the next `_prefetch` ones in flight. The
+        # workers only fetch; storing pages is left to this thread.
+        executor = ThreadPoolExecutor(max_workers=self._prefetch)
+        futures = {}
+        try:
+            for i in range(1, num_pages + 1):
+                for j in range(i, min(i + self._prefetch, num_pages) + 1):
+                    if j not in self._pages and j not in loaded and j not in futures:
+                        futures[j] = executor.submit(self._fetch_page, j)
+                yield get_page(i, futures.pop(i).result() if i in futures else None)
+        finally:
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+def _page_range(start, end, per_page):
+    """The indices of the pages of per_page items holding items start to end - 1."""
+    return list(range(start // per_page + 1, (end - 1) // per_page + 2))
+
+
+def _items(pages, start, end, per_page):
+    """Items start to end - 1, from a dict of the pages of per_page items holding them."""
+    items = []
+    for i in _page_range(start, end, per_page):
+        items.extend(pages[i])
+    offset = start - (start // per_page) * per_page
+    return items[offset:offset + end - start]
+
 
 class PaginatedList(BasePaginatedResponse):
     """A paginated list of objects of a particular class."""
@@ -385,7 +958,7 @@ class PaginatedList(BasePaginatedResponse):
         self.class_ = class_
 
     def _transform(self, item):
-        return self.class_(self.client, item)
+        return wrap(self.client, self.class_, item)
 
 
 class Wantlist(PaginatedList):
@@ -397,12 +970,12 @@ class Wantlist(PaginatedList):
             'notes_public': notes_public,
             'rating': rating,
         }
-        self.client._put(self.url + '/' + str(release_id), omit_none(data))
+        self.client._put(build_url(self.url, (release_id,)), omit_none(data))
         self._invalidate()
 
     def remove(self, release):
         release_id = release.id if isinstance(release, Release) else release
-        self.client._delete(self.url + '/' + str(release_id))
+        self.client._delete(build_url(self.url, (release_id,)))
         self._invalidate()
 
 
@@ -431,10 +1004,14 @@ class MixedPaginatedList(BasePaginatedResponse):
         if item['type'] in ('label', 'artist'):
             item['name'] = item['title']
 
-        return CLASS_MAP[item['type']](self.client, item)
+        return wrap(self.client, CLASS_MAP[item['type']], item)
 
 
 class Artist(PrimaryAPIObject):
+    _identity_key = 'id'
+    # From release credits and tracklists
+    _context_keys = frozenset(['anv', 'join', 'role', 'tracks'])
+
     id = SimpleField()
     name = SimpleField()
     real_name = SimpleField(key='realname')
@@ -450,7 +1027,7 @@ class Artist(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(Artist, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/artists/{1}'.format(client._base_url, dict_['id'])
+        self.data['resource_url'] = build_url(client._base_url, ('artists', dict_['id']))
 
     @property
     def releases(self):
@@ -461,6 +1038,8 @@ class Artist(PrimaryAPIObject):
 
 
 class Release(PrimaryAPIObject):
+    _identity_key = 'id'
+
     id = SimpleField()
     title = SimpleField()
     year = SimpleField()
@@ -483,13 +1062,13 @@ class Release(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(Release, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/releases/{1}'.format(client._base_url, dict_['id'])
+        self.data['resource_url'] = build_url(client._base_url, ('releases', dict_['id']))
 
     @property
     def master(self):
         master_id = self.fetch('master_id')
         if master_id:
-            return Master(self.client, {'id': master_id})
+            return wrap(self.client, Master, {'id': master_id})
         else:
             return None
 
@@ -498,6 +1077,8 @@ class Release(PrimaryAPIObject):
 
 
 class Master(PrimaryAPIObject):
+    _identity_key = 'id'
+
     id = SimpleField()
     title = SimpleField()
     data_quality = SimpleField()
@@ -512,13 +1093,17 @@ class Master(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(Master, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/masters/{1}'.format(client._base_url, dict_['id'])
+        self.data['resource_url'] = build_url(client._base_url, ('masters', dict_['id']))
 
     def __repr__(self):
         return self.repr_str('<Master {0!r} {1!r}>'.format(self.id, self.title))
 
 
 class Label(PrimaryAPIObject):
+    _identity_key = 'id'
+    # From a release's labels and companies
+    _context_keys = frozenset(['catno', 'entity_type', 'entity_type_name'])
+
     id = SimpleField()
     name = SimpleField()
     profile = SimpleField()
@@ -533,13 +1118,15 @@ class Label(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(Label, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/labels/{1}'.format(client._base_url, dict_['id'])
+        self.data['resource_url'] = build_url(client._base_url, ('labels', dict_['id']))
 
     def __repr__(self):
         return self.repr_str('<Label {0!r} {1!r}>'.format(self.id, self.name))
 
 
 class User(PrimaryAPIObject):
+    _identity_key = 'username'
+
     id = SimpleField()
     username = SimpleField()
     releases_contributed = SimpleField()
@@ -559,7 +1146,7 @@ class User(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(User, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/users/{1}'.format(client._base_url, dict_['username'])
+        self.data['resource_url'] = build_url(client._base_url, ('users', dict_['username']))
 
     @property
     def orders(self):
@@ -622,6 +1209,8 @@ class CollectionFolder(PrimaryAPIObject):
 
 
 class Listing(PrimaryAPIObject):
+    _identity_key = 'id'
+
     id = SimpleField()
     status = SimpleField()
     allow_offers = SimpleField()
@@ -638,13 +1227,15 @@ class Listing(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(Listing, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/marketplace/listings/{1}'.format(client._base_url, dict_['id'])
+        self.data['resource_url'] = build_url(client._base_url, ('marketplace', 'listings', dict_['id']))
 
     def __repr__(self):
         return self.repr_str('<Listing {0!r} {1!r}>'.format(self.id, self.release.data['description']))
 
 
 class Order(PrimaryAPIObject):
+    _identity_key = 'id'
+
     id = SimpleField()
     next_status = SimpleField()
     shipping_address = SimpleField()
@@ -661,7 +1252,7 @@ class Order(PrimaryAPIObject):
 
     def __init__(self, client, dict_):
         super(Order, self).__init__(client, dict_)
-        self.data['resource_url'] = '{0}/marketplace/orders/{1}'.format(client._base_url, dict_['id'])
+        self.data['resource_url'] = build_url(client._base_url, ('marketplace', 'orders', dict_['id']))
 
     # Setting shipping is a little weird -- you can't change the
     # currency, and you use the 'shipping' key instead of 'value'
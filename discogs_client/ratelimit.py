@@ -0,0 +1,123 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import random
+import threading
+import time
+try:
+    _monotonic = time.monotonic
+except AttributeError:
+    # python2
+    _monotonic = time.time
+
+
+class RateLimiter(object):
+    """
+    A token bucket that keeps a Client under the Discogs rate limit.
+
+    The bucket holds up to `limit` tokens and refills at `limit` tokens per
+    `period` seconds. Every request takes a token, blocking until one is
+    available, so a single RateLimiter can be shared by all the threads using
+    a client.
+
+    The bucket is kept in step with the server through the
+    X-Discogs-Ratelimit, X-Discogs-Ratelimit-Remaining and
+    X-Discogs-Ratelimit-Used response headers. When the server answers 429
+    anyway, requests are paused for an exponentially growing, jittered
+    interval, and retried up to `max_retries` times.
+
+    When `share` limiters split one account's rate limit between them (e.g.
+    one per worker process), each only takes its share of the limit and of
+    the remaining requests the server reports.
+    """
+    def __init__(self, limit=60, period=60.0, max_retries=5, backoff_base=1.0,
+                 backoff_max=60.0, clock=None, sleep=None, share=1):
+        self.limit = limit
+        self.period = period
+        self.share = share
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.used = None
+        self._clock = clock or _monotonic
+        self._sleep = sleep or time.sleep
+        self._lock = threading.Lock()
+        self._tokens = float(limit)
+        self._updated = self._clock()
+        self._paused_until = 0.0
+        self._throttled = 0
+
+    @property
+    def rate(self):
+        """Tokens regained per second."""
+        return self.limit / self.period
+
+    @property
+    def remaining(self):
+        """The number of requests that can be made right now without waiting."""
+        with self._lock:
+            self._refill(self._clock())
+            return int(self._tokens)
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(float(self.limit), self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """Take a token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def record(self, status_code, headers):
+        """Update the bucket from a response's status code and headers."""
+        limit = _int_header(headers, 'X-Discogs-Ratelimit')
+        remaining = _int_header(headers, 'X-Discogs-Ratelimit-Remaining')
+        used = _int_header(headers, 'X-Discogs-Ratelimit-Used')
+
+        with self._lock:
+            self._refill(self._clock())
+            if limit:
+                self.limit = max(1, limit // self.share)
+            if used is not None:
+                self.used = used
+            if remaining is not None:
+                # Other requests may still be in flight, so only ever trust
+                # the server when it's more pessimistic than we are.
+                self._tokens = min(self._tokens, float(remaining // self.share))
+
+            if status_code == 429:
+                self._throttle()
+            else:
+                self._throttled = 0
+
+    def _throttle(self):
+        # Back off harder the more consecutive 429s we get, whichever thread
+        # receives them; the jitter keeps waiting threads from stampeding.
+        delay = min(self.backoff_max, self.backoff_base * 2 ** self._throttled)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        self._throttled += 1
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, self._clock() + delay)
+
+
+def _int_header(headers, name):
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.lower())
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,56 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import random
+import time
+
+from requests.exceptions import ConnectionError, Timeout
+
+from discogs_client.ratelimit import _int_header
+
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class RetryPolicy(object):
+    """
+    Decides which failed requests a Client repeats, and how long it waits
+    before each attempt.
+
+    A request is retried when it gets one of the `statuses` or raises one of
+    the `exceptions` (by default, dropped connections and timeouts), up to
+    `max_retries` times, as long as its method is one of `methods`: by
+    default only idempotent ones, so that a POST is never sent twice. Pass
+    methods including 'POST' to opt in.
+
+    The wait grows exponentially from `backoff_base` seconds up to
+    `backoff_max`, with jitter, unless the response says how long to wait in
+    a Retry-After header.
+
+    429 responses are left to the client's RateLimiter.
+    """
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0,
+                 statuses=(500, 502, 503, 504), exceptions=(ConnectionError, Timeout),
+                 methods=IDEMPOTENT_METHODS, sleep=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.sleep = sleep or time.sleep
+
+    def retries_status(self, method, status_code, attempt):
+        """Whether a response with this status is retried, `attempt` retries in."""
+        return attempt < self.max_retries and method in self.methods and status_code in self.statuses
+
+    def retries_error(self, method, error, attempt):
+        """Whether a request that raised `error` is retried, `attempt` retries in."""
+        return attempt < self.max_retries and method in self.methods and isinstance(error, self.exceptions)
+
+    def backoff(self, attempt, headers=None):
+        """Seconds to wait before retry number `attempt` (counting from 1)."""
+        retry_after = _int_header(headers, 'Retry-After')
+        if retry_after is not None:
+            return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
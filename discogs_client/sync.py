@@ -0,0 +1,170 @@
+"""
+Incremental mirroring of a user's inventory, wantlist or collection folders.
+
+A Sync walks a paginated list newest first and stops as soon as it reaches
+items older than the newest one it saw last time (the watermark), so that a
+run only fetches the pages that gained items. It reports what changed since
+the previous run as added and updated items and removed IDs, and keeps a
+fingerprint of each item so that unchanged items aren't reported again.
+
+    state = load_state()
+    sync = Sync(me.inventory, state)
+    diff = sync.run()
+    for listing in diff.added:
+        ...
+    save_state(sync.state)
+
+The state is a plain dict that can be stored as JSON between runs.
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import copy
+import hashlib
+import json
+import re
+from collections import namedtuple
+from datetime import timedelta
+
+from six import string_types
+
+from discogs_client import models
+from discogs_client.utils import parse_timestamp
+
+
+# How to order each kind of item by date, and tell items apart:
+# class -> (sort key, date key, ID key)
+SYNC_KEYS = {
+    models.Listing: ('listed', 'posted', 'id'),
+    models.WantlistItem: ('added', 'date_added', 'id'),
+    models.CollectionItemInstance: ('added', 'date_added', 'instance_id'),
+}
+
+
+Diff = namedtuple('Diff', ['added', 'updated', 'removed'])
+
+
+class Sync(object):
+    """
+    Mirrors the paginated list `paginated` (e.g. user.inventory), starting
+    from `state`, the `state` of a previous Sync of the same list.
+
+    An incremental run only sees items added or moved to the top since the
+    previous run. Removals are noticed from the list's item count, and then
+    trigger a full pass over the list; changes to older items are only
+    noticed by a full run, e.g. run(full=True) once a day.
+
+    Pages hold `per_page` items, by default the most the API allows. The
+    sync pages through a copy of `paginated`, which is left as it was.
+    """
+    def __init__(self, paginated, state=None, sort_key=None, date_key=None, id_key=None, per_page=None):
+        keys = SYNC_KEYS.get(getattr(paginated, 'class_', None), (None, None, 'id'))
+        self.sort_key = sort_key or keys[0]
+        self.date_key = date_key or keys[1]
+        self.id_key = id_key or keys[2]
+        if self.sort_key is None or self.date_key is None:
+            raise ValueError('Cannot tell how to sort this list; pass sort_key and date_key')
+
+        # Copying a list leaves out its client (see __getstate__)
+        self.paginated = copy.copy(paginated)
+        self.paginated.client = paginated.client
+        self.paginated.sort(self.sort_key, 'desc')
+        self.paginated.per_page = per_page or paginated._max_per_page
+
+        state = state or {}
+        self.watermark = state.get('watermark')
+        self.fingerprints = dict(state.get('fingerprints', {}))
+        self.requests = 0
+
+    @property
+    def state(self):
+        return {'watermark': self.watermark, 'fingerprints': self.fingerprints}
+
+    def run(self, full=False):
+        """Bring the mirror up to date, and return a Diff of the changes."""
+        self.requests = 0
+        if self.watermark is None or full:
+            return self._full()
+
+        watermark = _instant(self.watermark)
+        added, updated = [], []
+        seen = set()
+        for data, item in self._walk():
+            if _instant(data[self.date_key]) < watermark:
+                break
+            self._compare(data, item, seen, added, updated)
+
+        # Every item on the list is either known or was just added, unless
+        # some have been removed.
+        if self.paginated._num_items < len(self.fingerprints):
+            diff = self._full()
+            return Diff(added + diff.added, updated + diff.updated, diff.removed)
+        return Diff(added, updated, [])
+
+    def _full(self):
+        known = self.fingerprints
+        self.fingerprints = {}
+        added, updated = [], []
+        seen = set()
+        for data, item in self._walk():
+            self._compare(data, item, seen, added, updated, known)
+        removed = [key for key in known if key not in seen]
+        return Diff(added, updated, removed)
+
+    def _compare(self, data, item, seen, added, updated, known=None):
+        known = self.fingerprints if known is None else known
+        key = str(data[self.id_key])
+        if key in seen:
+            # Moved down onto the next page while we were paging
+            return
+        seen.add(key)
+
+        fingerprint = _fingerprint(data)
+        previous = known.get(key)
+        if previous is None:
+            added.append(item)
+        elif previous != fingerprint:
+            updated.append(item)
+        self.fingerprints[key] = fingerprint
+
+        date = data.get(self.date_key)
+        if date and (self.watermark is None or _instant(date) > _instant(self.watermark)):
+            self.watermark = date
+
+    def _walk(self):
+        """
+        Yields the raw data and the object for each item, newest first.
+        Pages are fetched one at a time and not kept.
+        """
+        paginated = self.paginated
+        index = 1
+        while True:
+            data = paginated.client._get(paginated._url_for_page(index))
+            self.requests += 1
+            paginated._update_pagination_info(data)
+            for item in data[paginated._list_key]:
+                # Fingerprint the data as the list returned it, before any
+                # object gets to add to it
+                yield item, paginated._transform(dict(item))
+            if index >= paginated._num_pages:
+                return
+            index += 1
+
+
+def _fingerprint(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf8')).hexdigest()
+
+
+_OFFSET = re.compile(r'([+-])(\d\d):?(\d\d)$')
+
+
+def _instant(timestamp):
+    """Convert an ISO 8601 timestamp, with or without a UTC offset, into a UTC datetime."""
+    if not isinstance(timestamp, string_types):
+        return timestamp
+    instant = parse_timestamp(timestamp[:19])
+    offset = _OFFSET.search(timestamp[19:])
+    if offset is not None:
+        sign, hours, minutes = offset.groups()
+        delta = timedelta(hours=int(hours), minutes=int(minutes))
+        instant = instant - delta if sign == '+' else instant + delta
+    return instant
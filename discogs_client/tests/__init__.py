@@ -1,9 +1,11 @@
 import unittest
 import json
 import os
+import sys
 from discogs_client import Client
 from discogs_client.fetchers import LoggingDelegator, FilesystemFetcher, \
     MemoryFetcher
+from discogs_client.utils import build_url
 
 
 class DiscogsClientTestCase(unittest.TestCase):
@@ -42,9 +44,36 @@ class DiscogsClientTestCase(unittest.TestCase):
         self.assertEqual(data, json.dumps(assert_data))
 
 
+def paginated_response(items, page, per_page, key):
+    """A response with one page of `items`, listed under `key`"""
+    return json.dumps({
+        'pagination': {'items': len(items), 'page': page, 'per_page': per_page,
+                       'pages': (len(items) + per_page - 1) // per_page},
+        key: items[(page - 1) * per_page:page * per_page],
+    }).encode('utf8'), 200
+
+
+def paginated_responses(url, items, per_page, key):
+    """MemoryFetcher responses for every page of `items` listed at `url`"""
+    pages = (len(items) + per_page - 1) // per_page
+    return dict((build_url(url, params={'page': page, 'per_page': per_page}),
+                 paginated_response(items, page, per_page, key))
+                for page in range(1, pages + 1))
+
+
 def suite():
-    from discogs_client.tests import test_core, test_models, test_fetchers
-    suite = unittest.TestSuite(test_core.suite())
-    suite = unittest.TestSuite(test_models.suite())
-    suite = unittest.TestSuite(test_fetchers.suite())
+    from discogs_client.tests import test_core, test_models, test_fetchers, \
+        test_ratelimit, test_cache, test_sync, test_dumps, test_hooks, \
+        test_audit, test_retry, test_coalesce, test_threading, test_utils
+    suite = unittest.TestSuite()
+    for module in (test_core, test_models, test_fetchers, test_utils, test_ratelimit, test_cache,
+                   test_sync, test_dumps, test_hooks, test_audit, test_retry, test_coalesce,
+                   test_threading):
+        suite.addTests(module.suite())
+    if sys.version_info >= (3,):
+        from discogs_client.tests import test_export
+        suite.addTests(test_export.suite())
+    if sys.version_info >= (3, 6):
+        from discogs_client.tests import test_async
+        suite.addTests(test_async.suite())
     return suite
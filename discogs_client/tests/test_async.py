@@ -0,0 +1,163 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import unittest
+from discogs_client import Client
+from discogs_client.aio import AsyncClient, AsyncMemoryFetcher
+from discogs_client.exceptions import ConfigurationError, HTTPError
+from discogs_client.fetchers import LoggingDelegator
+from discogs_client.models import Artist, Price, User
+from discogs_client.retry import RetryPolicy
+from discogs_client.tests import paginated_responses
+
+
+class AsyncLoggingDelegator(LoggingDelegator):
+    async def fetch(self, client, method, url, data=None, headers=None, json=True):
+        self.requests.append((method, url, data, headers))
+        return await self.fetcher.fetch(client, method, url, data, headers, json)
+
+
+class AsyncClientTestCase(unittest.TestCase):
+    def setUp(self):
+        responses = paginated_responses('/artists/1/releases', [
+            {'id': 10, 'type': 'release', 'title': 'Mushroom'},
+            {'id': 11, 'type': 'master', 'title': 'Snake'},
+            {'id': 12, 'type': 'release', 'title': 'Badger Badger'},
+        ], 2, 'releases')
+        responses.update({
+            '/artists/1': (b'{"id": 1, "name": "Badger", "releases_url": "/artists/1/releases"}', 200),
+            '/users/example': (b'{"username": "example", "name": "Example"}', 200),
+            '/500': (b'{"message": "mushroom"}', 500),
+        })
+        self.a = AsyncClient('ua', fetcher=AsyncLoggingDelegator(AsyncMemoryFetcher(responses)))
+        self.a._base_url = ''
+
+    def run_async(self, coroutine):
+        # asyncio.run() needs Python 3.7
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_refresh_async(self):
+        """Objects are loaded with an awaited refresh and read as usual"""
+        artist = self.a.artist(1)
+        self.assertTrue(isinstance(artist, Artist))
+        self.assertEqual(artist.id, 1)
+        self.assertTrue(self.a._fetcher.last_request is None)
+
+        # Reading missing data can't block
+        self.assertRaises(ConfigurationError, lambda: artist.name)
+
+        self.run_async(artist.refresh_async())
+        self.assertEqual(artist.name, 'Badger')
+        self.assertEqual(len(self.a._fetcher.requests), 1)
+
+        # Keys absent from the full representation don't trigger a refresh
+        self.assertTrue(artist.real_name is None)
+        self.assertEqual(artist.aliases, [])
+        self.assertEqual(len(self.a._fetcher.requests), 1)
+
+    def test_save_async(self):
+        """Changes are saved and the object refreshed with awaits"""
+        user = self.a.user('example')
+        user.home_page = 'http://www.discogs.com'
+        self.run_async(user.save_async())
+
+        method, url, data, headers = self.a._fetcher.requests[0]
+        self.assertEqual(method, 'POST')
+        self.assertEqual(url, '/users/example')
+        self.assertEqual(data, {'home_page': 'http://www.discogs.com'})
+
+        method, url, data, headers = self.a._fetcher.requests[1]
+        self.assertEqual(method, 'GET')
+        self.assertEqual(user.name, 'Example')
+        self.assertEqual(user.changes, {})
+
+    def test_async_for(self):
+        """Paginated lists support async for and awaited pages"""
+        async def collect():
+            artist = self.a.artist(1)
+            await artist.refresh_async()
+            releases = artist.releases
+            releases.per_page = 2
+            titles = [r.title async for r in releases]
+            first_page = await releases.page_async(1)
+            return releases, titles, first_page
+
+        releases, titles, first_page = self.run_async(collect())
+        self.assertEqual(titles, ['Mushroom', 'Snake', 'Badger Badger'])
+        self.assertEqual(releases.pages, 2)
+        self.assertEqual(len(releases), 3)
+        self.assertEqual([r.id for r in first_page], [10, 11])
+        self.assertEqual(len(self.a._fetcher.requests), 3)
+
+    def test_http_error(self):
+        """Errors are raised from awaited requests"""
+        self.assertRaises(HTTPError, lambda: self.run_async(self.a.artist(2).refresh_async()))
+
+        try:
+            self.run_async(self.a._get_async('/500'))
+        except HTTPError as e:
+            self.assertEqual(e.status_code, 500)
+
+    def test_client_options(self):
+        """An AsyncClient is set up like a Client, and retries without blocking"""
+        responses = self.a._fetcher.fetcher.responses
+        a = AsyncClient('ua', fetcher=self.a._fetcher, retry=RetryPolicy(backoff_base=0))
+        a._base_url = ''
+        self.assertEqual((a.cache, a.rate_limiter, a.single_flight), (None, None, None))
+
+        attempts = []
+
+        async def flaky(client, method, url, data=None, headers=None, json=True):
+            attempts.append(url)
+            if len(attempts) < 3:
+                return b'{"message": "down"}', 503
+            return responses[url]
+        a._fetcher.fetch = flaky
+        self.assertEqual(self.run_async(a._get_async('/artists/1'))['name'], 'Badger')
+        self.assertEqual(len(attempts), 3)
+
+    def test_async_methods(self):
+        """Requests are made from the awaitable and async for versions of methods"""
+        responses = self.a._fetcher.fetcher.responses
+        responses['/oauth/identity'] = (b'{"username": "example"}', 200)
+        responses['/marketplace/fee/10.0000/USD'] = (b'{"value": 0.8, "currency": "USD"}', 200)
+        self.assertTrue(isinstance(self.run_async(self.a.identity_async()), User))
+        fee = self.run_async(self.a.fee_for_async(10))
+        self.assertTrue(isinstance(fee, Price))
+        self.assertEqual(fee.value, 0.8)
+        # The blocking versions can't be used
+        self.assertRaises(ConfigurationError, self.a.identity)
+
+        async def collect():
+            return [(artist.id, error) async for artist, error in self.a.artists([1, 2], max_workers=1)]
+        results = sorted(self.run_async(collect()), key=lambda result: result[0])
+        self.assertEqual(results[0], (1, None))
+        self.assertTrue(isinstance(results[1][1], HTTPError))
+
+        async def count():
+            artist = self.a.artist(1)
+            await artist.refresh_async()
+            releases = artist.releases
+            releases.per_page = 2
+            await releases.page_async(1)
+            return len(releases)
+        self.assertEqual(self.run_async(count()), 3)
+
+    def test_sync_client(self):
+        """Awaitable methods need an AsyncClient"""
+        client = Client('ua')
+        self.assertRaises(ConfigurationError, lambda: client.artist(1).refresh_async())
+        self.assertRaises(ConfigurationError, lambda: client.search('badger').page_async(1))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(AsyncClientTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,58 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+from discogs_client.audit import RefreshAudit
+from discogs_client.exceptions import NPlusOneError
+from discogs_client.tests import DiscogsClientTestCase
+
+
+class AuditTestCase(DiscogsClientTestCase):
+    def test_report(self):
+        """Implicit refreshes are attributed to the attribute and call site"""
+        with RefreshAudit(self.d, threshold=3) as audit:
+            for i in range(3):
+                self.d.release(1).title
+            self.d.artist(1).real_name
+            self.d.release(1).refresh()
+        self.assertTrue(self.d.refresh_audit is None)
+        self.assertEqual(audit.refreshes, 4)
+
+        finding, = audit.findings()
+        self.assertEqual((finding.class_name, finding.attribute, finding.count), ('Release', 'title', 3))
+        self.assertTrue(finding.filename.endswith('test_audit.py'))
+        self.assertEqual(finding.function, 'test_report')
+
+        artist, = audit.findings(threshold=1)[1:]
+        self.assertEqual((artist.class_name, artist.attribute), ('Artist', 'real_name'))
+
+        report = audit.report()
+        self.assertTrue(report.startswith('4 implicit refreshes, 1 N+1 patterns:'))
+        self.assertTrue('3 Release refreshes for .title at ' in report)
+
+        audit.reset()
+        self.assertEqual(audit.report(), '0 implicit refreshes, no N+1 patterns.')
+
+    def test_strict(self):
+        """Strict audits raise once a pattern reaches the threshold"""
+        def loop():
+            for i in range(3):
+                self.d.release(1).title
+
+        with RefreshAudit(self.d, threshold=2, strict=True):
+            self.assertRaises(NPlusOneError, loop)
+        try:
+            with RefreshAudit(self.d, threshold=2, strict=True):
+                loop()
+        except NPlusOneError as e:
+            self.assertEqual(e.finding.count, 2)
+            self.assertTrue(str(e).startswith('2 Release refreshes for .title at '))
+        self.assertEqual(len(self.d._fetcher.requests), 2)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(AuditTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,223 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+from discogs_client import Client
+from discogs_client.cache import MemoryCache, SqliteCache, CachingFetcher, auth_scope
+from discogs_client.exceptions import HTTPError
+from discogs_client.fetchers import Fetcher, LoggingDelegator, MemoryFetcher
+from discogs_client.tests import DiscogsClientTestCase
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConditionalFetcher(Fetcher):
+    """Serves a resource with an ETag and honours If-None-Match."""
+    def __init__(self, content, etag):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        self.requests.append(headers)
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return b'', 304, {'ETag': self.etag}
+        return self.content, 200, {'ETag': self.etag, 'Last-Modified': 'Tue, 01 Sep 2026 00:00:00 GMT'}
+
+
+class CacheTestCase(DiscogsClientTestCase):
+    def setUp(self):
+        super(CacheTestCase, self).setUp()
+        self.clock = FakeClock()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def caches(self, **kwargs):
+        kwargs['clock'] = self.clock
+        fd, path = tempfile.mkstemp(suffix='.sqlite', dir=self.tmp_dir)
+        os.close(fd)
+        return [MemoryCache(**kwargs), SqliteCache(path, **kwargs)]
+
+    def test_client_cache(self):
+        """Repeated GETs are served from the cache"""
+        cache = MemoryCache()
+        self.d.cache = cache
+
+        self.assertEqual(self.d.artist(1).name, 'Persuader, The')
+        self.assertEqual(self.d.artist(1).name, 'Persuader, The')
+        self.assertEqual(len(self.d._fetcher.requests), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Errors aren't cached
+        self.assertRaises(HTTPError, self.d.artist(0).refresh)
+        self.assertRaises(HTTPError, self.d.artist(0).refresh)
+        self.assertEqual(len(self.d._fetcher.requests), 3)
+
+    def test_invalidation(self):
+        """Changing a resource invalidates it and its parent collection"""
+        cache = MemoryCache()
+        self.m.cache = cache
+        self.m._fetcher.fetcher.responses.update({
+            '/users/example': (b'{"username": "example"}', 200),
+            '/users/example/wants': (b'{}', 200),
+            '/users/example/wants?page=1': (b'{}', 200),
+            '/users/example/wants/5': (b'{"id": 5}', 200),
+            '/users/example2': (b'{"username": "example2"}', 200),
+        })
+        for url in ('/users/example', '/users/example/wants', '/users/example/wants?page=1',
+                    '/users/example/wants/5', '/users/example2'):
+            self.m._get(url)
+        self.assertEqual(len(cache), 5)
+
+        self.m._put('/users/example/wants/5', {'rating': 5})
+        self.assertEqual(sorted(cache._entries), ['/users/example', '/users/example2'])
+
+        self.m._post('/users/example', {'name': 'Example'})
+        self.assertEqual(sorted(cache._entries), ['/users/example2'])
+
+    def test_ttl(self):
+        """Entries expire after their endpoint's TTL"""
+        for cache in self.caches(ttl=10, ttls={'/releases/{id}': 100, '/database/search': 0}):
+            cache.set('/artists/1', b'a', 200, {})
+            cache.set('/releases/1', b'r', 200, {})
+            cache.set('/database/search?q=badger', b's', 200, {})
+            self.assertTrue(cache.get('/database/search?q=badger') is None)
+
+            self.clock.now += 50
+            self.assertTrue(cache.get('/artists/1') is None)
+            self.assertEqual(cache.get('/releases/1').content, b'r')
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.clock.now -= 50
+
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted beyond the size limits"""
+        for cache in self.caches(max_entries=2):
+            cache.set('/artists/1', b'1', 200, {})
+            cache.set('/artists/2', b'2', 200, {})
+            cache.get('/artists/1')
+            cache.set('/artists/3', b'3', 200, {})
+            self.assertEqual(len(cache), 2)
+            self.assertTrue(cache.get('/artists/2') is None)
+            self.assertEqual(cache.get('/artists/1').content, b'1')
+
+        for cache in self.caches(max_bytes=10):
+            cache.set('/artists/1', b'12345', 200, {})
+            cache.set('/artists/2', b'12345', 200, {})
+            cache.set('/artists/3', b'1', 200, {})
+            self.assertEqual(len(cache), 2)
+            self.assertTrue(cache.get('/artists/1') is None)
+
+    def test_sqlite_hits(self):
+        """SqliteCache hits don't write, yet are remembered for eviction and between runs"""
+        path = os.path.join(self.tmp_dir, 'hits.sqlite')
+        cache = SqliteCache(path, max_entries=2)
+        cache.set('/artists/1', b'1', 200, {})
+        cache.set('/artists/2', b'2', 200, {})
+        cache.get('/artists/1')
+        self.assertFalse(cache._db.in_transaction)
+        cache.close()
+
+        cache = SqliteCache(path, max_entries=2)
+        cache.set('/artists/3', b'3', 200, {})
+        self.assertTrue(cache.get('/artists/2') is None)
+        self.assertEqual(cache.get('/artists/1').content, b'1')
+
+    def test_auth_scope(self):
+        """Responses are only served to clients with the same credentials"""
+        for cache in self.caches():
+            clients = []
+            for token in ('alice', 'bob', None):
+                fetcher = LoggingDelegator(MemoryFetcher({'/users/me': (b'{"token": "%s"}' % str(token).encode('utf8'), 200)}))
+                fetcher.user_token = token
+                client = Client('ua', cache=cache, fetcher=fetcher)
+                client._base_url = ''
+                clients.append(client)
+            for _ in range(2):
+                self.assertEqual([client._get('/users/me')['token'] for client in clients],
+                                 ['alice', 'bob', 'None'])
+            self.assertEqual([len(client._fetcher.requests) for client in clients], [1, 1, 1])
+            self.assertEqual(len(cache), 3)
+            self.assertNotEqual(auth_scope(clients[0]._fetcher), auth_scope(clients[1]._fetcher))
+            self.assertTrue(auth_scope(clients[2]._fetcher) is None)
+
+            # Changing the resource invalidates it for everyone
+            cache.invalidate('/users/me')
+            self.assertEqual(len(cache), 0)
+
+    def test_revalidation(self):
+        """Stale entries with validators are revalidated with conditional requests"""
+        for cache in self.caches(ttl=10):
+            fetcher = ConditionalFetcher(b'{"id": 1, "name": "Badger"}', '"v1"')
+            client = Client('ua', cache=cache)
+            client._base_url = ''
+            client._fetcher = fetcher
+
+            self.assertEqual(client._get('/artists/1')['name'], 'Badger')
+            self.assertEqual(client._get('/artists/1')['name'], 'Badger')
+            self.assertEqual(len(fetcher.requests), 1)
+            self.assertFalse('If-None-Match' in fetcher.requests[0])
+
+            # Once stale, the entry is revalidated rather than downloaded again
+            self.clock.now += 20
+            self.assertEqual(client._get('/artists/1')['name'], 'Badger')
+            self.assertEqual(len(fetcher.requests), 2)
+            self.assertEqual(fetcher.requests[1]['If-None-Match'], '"v1"')
+            self.assertEqual(fetcher.requests[1]['If-Modified-Since'], 'Tue, 01 Sep 2026 00:00:00 GMT')
+            self.assertEqual(fetcher.requests[1]['User-Agent'], 'ua')
+            self.assertEqual((cache.hits, cache.misses, cache.revalidations), (2, 1, 1))
+
+            # ...which makes it fresh again
+            self.assertEqual(client._get('/artists/1')['name'], 'Badger')
+            self.assertEqual(len(fetcher.requests), 2)
+
+            # A changed resource is downloaded and replaces the entry
+            self.clock.now += 20
+            fetcher.content, fetcher.etag = b'{"id": 1, "name": "Mushroom"}', '"v2"'
+            self.assertEqual(client._get('/artists/1')['name'], 'Mushroom')
+            self.assertEqual(cache.get('/artists/1').headers['ETag'], '"v2"')
+            self.clock.now -= 40
+
+    def test_sqlite_persistence(self):
+        """SqliteCache keeps entries between instances"""
+        path = os.path.join(self.tmp_dir, 'persist.sqlite')
+        cache = SqliteCache(path)
+        cache.set('/artists/1', b'{"id": 1}', 200, {'ETag': '"abc"'})
+        cache.close()
+
+        cache = SqliteCache(path)
+        entry = cache.get('/artists/1')
+        self.assertEqual(entry.content, b'{"id": 1}')
+        self.assertEqual(entry.headers, {'ETag': '"abc"'})
+        cache.invalidate('/artists/1')
+        self.assertTrue(cache.get('/artists/1') is None)
+
+    def test_caching_fetcher(self):
+        """CachingFetcher wraps any fetcher"""
+        memory = LoggingDelegator(MemoryFetcher({'/artists/1': (b'{"id": 1, "name": "Badger"}', 200)}))
+        client = Client('ua')
+        client._base_url = ''
+        client._fetcher = CachingFetcher(memory, MemoryCache())
+
+        self.assertEqual(client.artist(1).name, 'Badger')
+        self.assertEqual(client.artist(1).name, 'Badger')
+        self.assertEqual(len(memory.requests), 1)
+        self.assertEqual(client._fetcher.last_request[1], '/artists/1')
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(CacheTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,101 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import unittest
+from discogs_client import Client
+from discogs_client.exceptions import HTTPError
+from discogs_client.fetchers import Fetcher
+
+
+class GatedFetcher(Fetcher):
+    """Holds every request until the gate is opened, counting them."""
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+        self.gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        with self._lock:
+            self.requests.append((method, url))
+        self.gate.wait(5)
+        return self.responses[url]
+
+
+class CoalesceTestCase(unittest.TestCase):
+    def client(self, responses, coalesce=True):
+        client = Client('ua', coalesce=coalesce)
+        client._base_url = ''
+        client._fetcher = GatedFetcher(responses)
+        return client
+
+    def run_threads(self, client, target, count=8, ready=None):
+        results = [None] * count
+
+        def work(i):
+            try:
+                results[i] = target(i)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        # Wait for every thread to have made its request before letting
+        # them through
+        flight = client.single_flight
+        ready = ready or (lambda: flight.calls + flight.shared == count)
+        while not ready():
+            threading.Event().wait(0.001)
+        client._fetcher.gate.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_coalesce(self):
+        """Concurrent GETs for the same URL share one request and its result"""
+        client = self.client({
+            '/releases/1?a=1&b=2': (b'{"id": 1, "title": "Stockholm"}', 200),
+        })
+        urls = ['/releases/1?a=1&b=2', '/releases/1?b=2&a=1']
+        results = self.run_threads(client, lambda i: client._get(urls[i % 2]))
+
+        self.assertEqual(len(client._fetcher.requests), 1)
+        self.assertEqual(client.single_flight.calls, 1)
+        self.assertEqual(client.single_flight.shared, 7)
+        self.assertEqual(results, [{'id': 1, 'title': 'Stockholm'}] * 8)
+        # Each caller gets a body of its own
+        self.assertEqual(len(set(id(result) for result in results)), 8)
+
+        # Once it's done, the next request goes out again
+        client._get(urls[0])
+        self.assertEqual(len(client._fetcher.requests), 2)
+
+    def test_coalesce_errors(self):
+        """Requests sharing a failed request all raise its error"""
+        client = self.client({'/releases/2': (b'{"message": "Not found"}', 404)})
+        results = self.run_threads(client, lambda i: client._get('/releases/2'), count=4)
+        self.assertEqual(len(client._fetcher.requests), 1)
+        self.assertTrue(all(isinstance(result, HTTPError) for result in results))
+
+    def test_no_coalesce(self):
+        """Without coalescing, or for other methods, every request goes out"""
+        self.assertEqual(Client('ua').single_flight, None)
+        client = self.client({'/releases/1': (b'{"id": 1}', 200)}, coalesce=False)
+        self.run_threads(client, lambda i: client._get('/releases/1'), count=4,
+                         ready=lambda: len(client._fetcher.requests) == 4)
+        self.assertEqual(len(client._fetcher.requests), 4)
+
+        client = self.client({'/releases/1': (b'', 204)})
+        self.run_threads(client, lambda i: client._delete('/releases/1'), count=4,
+                         ready=lambda: len(client._fetcher.requests) == 4)
+        self.assertEqual(len(client._fetcher.requests), 4)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(CoalesceTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
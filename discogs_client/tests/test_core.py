@@ -1,8 +1,10 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import gc
+import json
 import unittest
-from discogs_client import Client
-from discogs_client.tests import DiscogsClientTestCase
+from discogs_client import Client, models
+from discogs_client.tests import DiscogsClientTestCase, paginated_responses
 from discogs_client.exceptions import ConfigurationError, HTTPError
 from datetime import datetime
 
@@ -34,15 +36,47 @@ class CoreTestCase(DiscogsClientTestCase):
         self.assertEqual(a.real_name, 'Jesper Dahlb\u00e4ck')
         self.assertEqual(len(self.d._fetcher.requests), 1)
 
-        # Get a key that's not in our cache
+        # Get a key that's not in our cache: the object has already been
+        # refreshed, so it's known not to exist
         a.fetch('blorf')
-        self.assertEqual(len(self.d._fetcher.requests), 2)
+        self.assertEqual(len(self.d._fetcher.requests), 1)
         self.assertTrue('blorf' in a._known_invalid_keys)
 
-        # Now we know artists don't have blorves
-        a.fetch('blorf')
+        # Another partial artist refreshes once, and only once
+        a2 = self.d.artist(2)
+        self.assertEqual(a2.fetch('blorf'), None)
+        self.assertEqual(a2.fetch('glorp'), None)
+        self.assertEqual(a2.fetch('florb'), None)
+        self.assertEqual(len(self.d._fetcher.requests), 2)
+
+        # Now we know this artist doesn't have blorves, whichever instance we ask
+        self.assertEqual(self.d.artist(1).fetch('blorf'), None)
         self.assertEqual(len(self.d._fetcher.requests), 2)
 
+    def test_decoder(self):
+        """Responses can be parsed with a chosen JSON decoder"""
+        decoded = []
+
+        def decoder(content):
+            self.assertTrue(isinstance(content, bytes))
+            decoded.append(content)
+            return json.loads(content.decode('utf8'))
+
+        client = Client('ua', decoder=decoder)
+        client._base_url = ''
+        client._fetcher = self.d._fetcher
+        self.assertEqual(client.artist(1).name, 'Persuader, The')
+        self.assertEqual(len(decoded), 1)
+
+        client = Client('ua', decoder='json')
+        client._base_url = ''
+        client._fetcher = self.d._fetcher
+        self.assertEqual(client.release(1).title, 'Stockholm')
+        self.assertRaises(ValueError, lambda: Client('ua', decoder='yaml'))
+
+        # ujson, which may round floats, is never picked by default
+        self.assertTrue(Client('ua').decoder.__module__ in ('orjson', 'discogs_client.decoders'))
+
     def test_equality(self):
         """APIObjects of the same class are equal if their IDs are"""
         a1 = self.d.artist(1)
@@ -56,6 +90,47 @@ class CoreTestCase(DiscogsClientTestCase):
         self.assertNotEqual(a1, r1)
         self.assertNotEqual(r1, ':D')
 
+    def test_identity_map(self):
+        """With an identity map, references to a resource share one object"""
+        self.assertFalse(self.d.artist(1) is self.d.artist(1))
+
+        client = Client('ua', identity_map=True)
+        client._base_url = ''
+        client._fetcher = self.d._fetcher
+
+        artist = client.artist(1)
+        release = client.release(1)
+        self.assertTrue(artist is client.artist(1))
+        self.assertTrue(release is client.release(1))
+        self.assertTrue(artist is release.artists[0])
+        self.assertFalse(artist is client.label(1))
+        self.assertEqual(len(self.d._fetcher.requests), 1)
+
+        # The artist's credit on the release isn't merged into it
+        self.assertEqual(sorted(artist.data), ['id', 'name', 'resource_url'])
+
+        # Nor does the shared object keep the credit it was first seen with
+        a = models.Release(client, {'id': 2, 'extraartists': [{'id': 5, 'name': 'X', 'role': 'Producer'}]})
+        b = models.Release(client, {'id': 3, 'extraartists': [{'id': 5, 'name': 'X', 'role': 'Mixed By'}]})
+        self.assertTrue(a.credits[0] is b.credits[0])
+        self.assertFalse('role' in a.credits[0].data)
+        self.assertEqual([r.data['extraartists'][0]['role'] for r in (a, b)], ['Producer', 'Mixed By'])
+
+        # Data loaded through one reference is seen through the others
+        self.assertEqual(release.artists[0].real_name, 'Jesper Dahlb\u00e4ck')
+        self.assertEqual(artist.data['realname'], 'Jesper Dahlb\u00e4ck')
+        self.assertEqual(artist.name, 'Persuader, The')
+        self.assertEqual(len(self.d._fetcher.requests), 2)
+
+        # Users are keyed by username
+        self.assertTrue(client.user('example') is client.user('example'))
+        self.assertTrue(client.user('caf\xe9') is client.user('caf\xe9'))
+
+        # Objects are forgotten once nothing refers to them
+        del artist, release, a, b
+        gc.collect()
+        self.assertEqual(len(client._identity_map), 0)
+
     def test_transform_datetime(self):
         """String timestamps are converted to datetimes"""
         registered = self.d.user('example').registered
@@ -81,6 +156,26 @@ class CoreTestCase(DiscogsClientTestCase):
             m.main_release = 'lol!'
         self.assertRaises(AttributeError, fail)
 
+    def test_bulk_fetch(self):
+        """Objects can be fetched in bulk, with per-item errors"""
+        results = dict((obj.id, (obj, error)) for obj, error in self.d.releases([1, 2, 0], max_workers=2))
+        self.assertEqual(sorted(results), [0, 1, 2])
+
+        release, error = results[1]
+        self.assertTrue(error is None)
+        self.assertEqual(len(self.d._fetcher.requests), 3)
+        self.assertEqual(release.title, 'Stockholm')
+        self.assertEqual(len(self.d._fetcher.requests), 3)
+
+        release, error = results[0]
+        self.assertTrue(isinstance(error, HTTPError))
+        self.assertEqual(error.status_code, 404)
+
+        artists = list(self.d.artists(iter([1, 2, 3])))
+        self.assertEqual(sorted(a.name for a, error in artists),
+                         ['Josh Wink', 'Mr. James Barth & A.D.', 'Persuader, The'])
+        self.assertTrue(all(error is None for a, error in artists))
+
     def test_pagination(self):
         """PaginatedLists are parsed correctly, indexable, and iterable"""
         results = self.d.artist(1).releases
@@ -108,6 +203,100 @@ class CoreTestCase(DiscogsClientTestCase):
         results.per_page = 10
         self.assertTrue(results._num_pages is None)
 
+    def test_prefetch(self):
+        """Prefetching pages yields the same items in the same order"""
+        expected = [r.id for r in self.d.artist(1).releases]
+        self.d._fetcher.requests = []
+
+        results = self.d.artist(1).releases.prefetch(2)
+        self.assertEqual([r.id for r in results], expected)
+        self.assertEqual(sorted(r[1] for r in self.d._fetcher.requests), [
+            '/artists/1',
+            '/artists/1/releases?page=1&per_page=50',
+            '/artists/1/releases?page=2&per_page=50',
+        ])
+
+        # Pages are cached as usual
+        self.assertEqual(len(results._pages), 2)
+        self.assertRaises(ValueError, lambda: results.prefetch(-1))
+
+    def test_stream(self):
+        """Streaming lists keep a bounded number of pages"""
+        expected = [r.id for r in self.d.artist(1).releases]
+
+        results = self.d.artist(1).releases
+        self.assertEqual([r.id for r in results.iter_stream()], expected)
+        self.assertEqual(len(results._pages), 0)
+
+        results = self.d.artist(1).releases.stream(max_pages=1)
+        self.assertEqual([r.id for r in results], expected)
+        self.assertEqual(list(results._pages), [2])
+
+        # Random access only keeps the most recently used pages
+        self.d._fetcher.requests = []
+        self.assertEqual(results[55].id, expected[55])
+        self.assertEqual(results[0].id, expected[0])
+        self.assertEqual(list(results._pages), [1])
+        self.assertEqual(len(self.d._fetcher.requests), 1)
+
+        results = self.d.artist(1).releases.prefetch(2).stream(max_pages=1)
+        self.assertEqual([r.id for r in results.iter_stream()], expected)
+        self.assertEqual(len(results._pages), 0)
+        self.assertEqual([r.id for r in results], expected)
+        self.assertEqual(len(results._pages), 1)
+        self.assertRaises(ValueError, lambda: results.stream(-1))
+
+    def test_slicing(self):
+        """Paginated lists can be sliced, fetching only the pages needed"""
+        items = list(range(250))
+        responses = {}
+        for per_page in (10, 50, 100):
+            responses.update(paginated_responses('/items', items, per_page, 'items'))
+        self.m._fetcher.fetcher.responses = responses
+
+        def requests():
+            urls = sorted(r[1] for r in self.m._fetcher.requests)
+            self.m._fetcher.requests = []
+            return urls
+
+        lst = models.BasePaginatedResponse(self.m, '/items')
+        self.assertEqual(lst[-1], 249)
+        self.assertEqual(lst[45:55], items[45:55])
+        self.assertEqual(requests(), ['/items?page=1&per_page=50', '/items?page=2&per_page=50',
+                                      '/items?page=5&per_page=50'])
+
+        # Big ranges are fetched with the largest pages, which aren't kept
+        lst = models.BasePaginatedResponse(self.m, '/items').prefetch(2)
+        self.assertEqual(lst[20:220], items[20:220])
+        self.assertEqual(requests(), ['/items?page=1&per_page=100', '/items?page=1&per_page=50',
+                                      '/items?page=2&per_page=100', '/items?page=3&per_page=100'])
+        self.assertEqual(lst.per_page, 50)
+        self.assertEqual(list(lst._pages), [1])
+        self.assertEqual(lst[-5:], items[-5:])
+        self.assertEqual(lst[::-60], items[::-60])
+        self.assertEqual(sorted(lst._pages), [1, 2, 3, 4, 5])
+        requests()
+        self.assertEqual(lst[300:400], [])
+        self.assertEqual(lst.take(-3, 10), items[-3:])
+        self.assertEqual(requests(), [])
+        self.assertRaises(IndexError, lambda: lst[-251])
+
+        # Ranges on loaded pages are served from them, and reads leave the
+        # list's pages alone
+        lst = models.BasePaginatedResponse(self.m, '/items')
+        self.assertEqual(list(lst), items)
+        requests()
+        self.assertEqual(lst[0:60], items[:60])
+        self.assertEqual(requests(), [])
+        self.assertEqual(lst.page(2), items[50:100])
+        self.assertEqual(lst.per_page, 50)
+
+        # Unless the page size has been chosen
+        lst = models.BasePaginatedResponse(self.m, '/items')
+        lst.per_page = 10
+        self.assertEqual(lst.take(0, 25), items[:25])
+        self.assertEqual(len(requests()), 3)
+
 
 def suite():
     suite = unittest.TestSuite()
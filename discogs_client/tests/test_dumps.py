@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from discogs_client import Client
+from discogs_client.dumps import DumpFetcher, DumpStore, iter_dump
+from discogs_client.exceptions import HTTPError
+from discogs_client.fetchers import MemoryFetcher
+
+
+ARTISTS = '''<artists>
+<artist><id>1</id><name>The Persuader</name><realname>Jesper Dahlbäck</realname>
+<profile></profile><data_quality>Needs Vote</data_quality>
+<urls><url>https://example.com/persuader</url></urls>
+<namevariations><name>Persuader</name><name>The Presuader</name></namevariations>
+<aliases><name id="239">Jesper Dahlbäck</name></aliases></artist>
+<artist><id>2</id><name>Mr. James Barth &amp; A.D.</name>
+<members><id>26</id><name id="26">Alexi Delano</name></members></artist>
+</artists>'''
+
+LABELS = '''<labels>
+<label><id>1</id><name>Planet E</name><contactinfo>Detroit</contactinfo>
+<sublabels><label id="86537">Antidote (4)</label></sublabels></label>
+<label><id>5</id><name>Svek</name><parentLabel id="1">Planet E</parentLabel></label>
+</labels>'''
+
+MASTERS = '''<masters>
+<master id="5427"><main_release>1</main_release><title>Stockholm</title><year>1999</year>
+<genres><genre>Electronic</genre></genres>
+<videos><video src="https://www.youtube.com/watch?v=x" duration="290" embed="true">
+<title>Östermalm</title><description /></video></videos></master>
+</masters>'''
+
+RELEASES = '''<releases>
+<release id="1" status="Accepted">
+<artists><artist><id>1</id><name>The Persuader</name><anv></anv><join></join><role></role></artist></artists>
+<title>Stockholm</title>
+<labels><label name="Svek" catno="SK032" id="5" /></labels>
+<formats><format name="Vinyl" qty="2" text=""><descriptions><description>12"</description></descriptions></format></formats>
+<genres><genre>Electronic</genre></genres><styles><style>Deep House</style></styles>
+<country>Sweden</country><released>1999-03-00</released>
+<master_id is_main_release="true">5427</master_id>
+<tracklist>
+<track><position>A</position><title>Östermalm</title><duration>4:45</duration></track>
+<track><position>B1</position><title>Vasastaden</title><duration>6:11</duration></track>
+</tracklist></release>
+</releases>'''
+
+
+class DumpsTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.store = DumpStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        os.remove(self.path)
+
+    def dump(self, xml):
+        return io.BytesIO(xml.encode('utf8'))
+
+    def test_iter_dump(self):
+        """Dump records are converted to what the API returns"""
+        artists = list(iter_dump(self.dump(ARTISTS)))
+        self.assertEqual([kind for kind, data in artists], ['artists', 'artists'])
+        persuader = artists[0][1]
+        self.assertEqual(persuader['id'], 1)
+        self.assertEqual(persuader['realname'], 'Jesper Dahlbäck')
+        self.assertEqual(persuader['namevariations'], ['Persuader', 'The Presuader'])
+        self.assertEqual(persuader['aliases'], [{'id': 239, 'name': 'Jesper Dahlbäck'}])
+        self.assertEqual(artists[1][1]['members'], [{'id': 26, 'name': 'Alexi Delano'}])
+
+        (kind, release), = iter_dump(self.dump(RELEASES))
+        self.assertEqual(release['labels'], [{'name': 'Svek', 'catno': 'SK032', 'id': 5}])
+        self.assertEqual(release['formats'][0]['descriptions'], ['12"'])
+        self.assertEqual((release['year'], release['master_id']), (1999, 5427))
+
+    def test_fetcher(self):
+        """Models work unchanged on top of a dump store"""
+        fd, gz_path = tempfile.mkstemp(suffix='.gz')
+        os.close(fd)
+        try:
+            with gzip.open(gz_path, 'wb') as f:
+                f.write(RELEASES.encode('utf8'))
+            self.assertEqual(self.store.ingest(gz_path), 1)
+        finally:
+            os.remove(gz_path)
+        self.assertEqual(self.store.ingest(self.dump(ARTISTS), batch_size=1), 2)
+        self.store.ingest(self.dump(LABELS))
+        self.store.ingest(self.dump(MASTERS))
+        self.assertEqual(self.store.count('labels'), 2)
+        self.assertEqual(len(self.store), 6)
+
+        client = Client('ua', fetcher=DumpFetcher(self.store))
+        release = client.release(1)
+        self.assertEqual(release.title, 'Stockholm')
+        self.assertEqual([t.title for t in release.tracklist], ['Östermalm', 'Vasastaden'])
+        self.assertEqual(release.artists[0].real_name, 'Jesper Dahlbäck')
+        self.assertEqual(release.labels[0].parent_label.name, 'Planet E')
+        self.assertEqual(release.master.main_release, release)
+        self.assertEqual(release.master.videos[0].url, 'https://www.youtube.com/watch?v=x')
+        self.assertEqual(client.label(1).contact_info, 'Detroit')
+        self.assertEqual(client.label(1).sublabels[0].id, 86537)
+
+        self.assertRaises(HTTPError, lambda: client.artist(3).name)
+
+    def test_fallback(self):
+        """Whatever isn't in the dumps comes from the fallback fetcher"""
+        self.store.ingest(self.dump(ARTISTS))
+        fallback = MemoryFetcher({'/artists/1/releases': (b'{"releases": []}', 200)})
+        fetcher = DumpFetcher(self.store, fallback=fallback)
+        self.assertEqual(fetcher.fetch(None, 'GET', '/artists/1/releases'), (b'{"releases": []}', 200))
+        content, status_code = fetcher.fetch(None, 'GET', 'https://api.discogs.com/artists/2')
+        self.assertEqual(status_code, 200)
+        # Only top-level resources are answered from the dumps
+        self.store.ingest(self.dump(RELEASES))
+        nested = '/users/x/collection/folders/0/releases/1'
+        self.assertEqual(fetcher.fetch(None, 'GET', nested)[1], 404)
+        self.assertEqual(DumpFetcher(self.store).fetch(None, 'GET', nested)[1], 404)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(DumpsTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
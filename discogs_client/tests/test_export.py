@@ -0,0 +1,120 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import io
+import json
+import pickle
+import unittest
+from discogs_client import Client, Release
+from discogs_client.export import ClientConfig, CSVSink, JSONLinesSink, export, _split_rate_limit
+from discogs_client.fetchers import LoggingDelegator, MemoryFetcher
+from discogs_client.models import PaginatedList
+from discogs_client.retry import RetryPolicy
+from discogs_client.tests import paginated_responses
+
+ITEMS = 230
+
+
+def catalog(per_page=50):
+    releases = [{'id': i, 'title': 'Release %d' % i, 'formats': ['LP']} for i in range(1, ITEMS + 1)]
+    return paginated_responses('/lists/1', releases, per_page, 'releases')
+
+
+def title(release):
+    return {'id': release.id, 'title': release.title}
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = Client('ua', fetcher=MemoryFetcher(catalog()))
+        self.client._base_url = ''
+        self.releases = PaginatedList(self.client, '/lists/1', 'releases', Release)
+
+    def test_jsonl(self):
+        """Items from every worker are written in the list's order"""
+        out = io.StringIO()
+        self.client._fetcher = LoggingDelegator(self.client._fetcher)
+        written = export(self.releases, JSONLinesSink(out), processes=2, pages_per_task=1)
+        self.assertEqual(written, ITEMS)
+        # Only the first page was fetched here; the workers fetched the rest
+        self.assertEqual([url for method, url, data, headers in self.client._fetcher.requests],
+                         ['/lists/1?page=1&per_page=50'])
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['id'] for r in records], list(range(1, ITEMS + 1)))
+        self.assertEqual(records[-1]['title'], 'Release %d' % ITEMS)
+
+    def test_csv(self):
+        out = io.StringIO()
+        self.releases.per_page = 100
+        self.client._fetcher = MemoryFetcher(catalog(per_page=100))
+        export(self.releases, CSVSink(out, ['id', 'title', 'formats', 'year']), processes=2)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), ITEMS + 1)
+        self.assertEqual(lines[0], 'id,title,formats,year')
+        self.assertEqual(lines[2], '2,Release 2,"[""LP""]",')
+
+    def test_transform(self):
+        out = io.StringIO()
+        export(self.releases, JSONLinesSink(out), processes=2, transform=title)
+        self.assertEqual(json.loads(out.getvalue().splitlines()[100]), {'id': 101, 'title': 'Release 101'})
+
+    def test_config(self):
+        """A client's configuration survives pickling, without its connections"""
+        client = Client('ua', user_token='t0k3n', rate_limiter=True, timeout=5,
+                        retry=RetryPolicy(max_retries=2), decoder='json')
+        config = pickle.loads(pickle.dumps(ClientConfig.from_client(client)))
+        self.assertEqual(config.fetcher, None)
+        copy = config.client()
+        self.assertEqual(copy.user_agent, 'ua')
+        self.assertEqual(copy._fetcher.user_token, 't0k3n')
+        self.assertEqual(copy._fetcher.timeout, 5)
+        self.assertEqual(copy.rate_limiter.limit, 60)
+        self.assertEqual(copy.retry_policy.max_retries, 2)
+        self.assertTrue(copy._fetcher is not client._fetcher)
+
+        client = Client('ua', consumer_key='a', consumer_secret='b', token='c', secret='d')
+        config = ClientConfig.from_client(client)
+        self.assertEqual((config.consumer_key, config.consumer_secret, config.token, config.secret),
+                         ('a', 'b', 'c', 'd'))
+
+    def test_rate_limit(self):
+        """Workers share what's left of the rate limit after the first page"""
+        config = ClientConfig('ua', rate_limit=(60, 60.0))
+        worker_config, workers = _split_rate_limit(config, 4)
+        self.assertEqual((worker_config.rate_limit, workers), ((14, 60.0), 4))
+        self.assertEqual(config.rate_limit, (60, 60.0))
+
+        # ...and keep to their share once the server reports the limit
+        limiter = pickle.loads(pickle.dumps(worker_config)).client().rate_limiter
+        limiter.record(200, {'X-Discogs-Ratelimit': '60', 'X-Discogs-Ratelimit-Remaining': '59'})
+        self.assertEqual(limiter.limit, 15)
+        self.assertTrue(limiter.rate * workers <= 1.0)
+
+        # Never more workers than requests
+        config.rate_limit = (5, 60.0)
+        worker_config, workers = _split_rate_limit(config, 64)
+        self.assertEqual((worker_config.rate_limit, workers), ((1, 60.0), 4))
+
+        config.rate_limit = (1, 60.0)
+        self.assertRaises(ValueError, _split_rate_limit, config, 4)
+        self.assertEqual(_split_rate_limit(ClientConfig('ua'), 4)[1], 4)
+
+    def test_pickle_list(self):
+        """Lists are pickled without their client or pages"""
+        self.assertEqual(len(self.releases), ITEMS)
+        copy = pickle.loads(pickle.dumps(self.releases))
+        self.assertEqual(copy.client, None)
+        self.assertEqual(len(copy._pages), 0)
+        self.assertEqual(copy.count, ITEMS)
+        self.assertEqual(copy._url_for_page(2), self.releases._url_for_page(2))
+
+        copy.client = self.client
+        self.assertEqual(copy[60].id, 61)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(ExportTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
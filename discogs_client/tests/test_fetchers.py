@@ -1,8 +1,34 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
+import tempfile
 import unittest
+from discogs_client import Client
 from discogs_client.tests import DiscogsClientTestCase
 from discogs_client.exceptions import HTTPError
+from discogs_client.fetchers import RequestsFetcher, OAuth2Fetcher, \
+    UserTokenRequestsFetcher, CassetteFetcher, MemoryFetcher
+
+
+class FakeResponse(object):
+    def __init__(self, content=b'{}', status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession(object):
+    """Stands in for requests.Session and records what it was asked to do."""
+    def __init__(self):
+        self.requests = []
+        self.closed = False
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return FakeResponse()
+
+    def close(self):
+        self.closed = True
 
 
 class FetcherTestCase(DiscogsClientTestCase):
@@ -20,6 +46,114 @@ class FetcherTestCase(DiscogsClientTestCase):
         self.assertRaises(HTTPError, lambda: self.m.release(1).title)
         self.assertTrue(self.m._get('/204') is None)
 
+    def test_pooled_session(self):
+        """Network fetchers mount a sized connection pool on their session"""
+        fetcher = RequestsFetcher(pool_connections=3, pool_maxsize=7, max_retries=2)
+        adapter = fetcher.session.get_adapter('https://api.discogs.com')
+        self.assertEqual(adapter._pool_connections, 3)
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertEqual(adapter.max_retries.total, 2)
+        fetcher.close()
+
+    def test_session_reused(self):
+        """Every request goes through the fetcher's session with its timeout"""
+        session = FakeSession()
+        fetcher = UserTokenRequestsFetcher('tok', timeout=5, session=session)
+        fetcher.fetch(None, 'GET', 'https://api.discogs.com/artists/1')
+        fetcher.fetch(None, 'GET', 'https://api.discogs.com/artists/2')
+
+        self.assertEqual(len(session.requests), 2)
+        method, url, kwargs = session.requests[1]
+        self.assertEqual(url, 'https://api.discogs.com/artists/2')
+        self.assertEqual(kwargs['params'], {'token': 'tok'})
+        self.assertEqual(kwargs['timeout'], 5)
+
+    def test_client_fetcher_options(self):
+        """Client passes its pool settings on to the fetchers it creates"""
+        client = Client('ua', pool_maxsize=20, timeout=(3, 10))
+        self.assertEqual(client._fetcher.pool_maxsize, 20)
+        self.assertEqual(client._fetcher.timeout, (3, 10))
+
+        client.set_consumer_key('key', 'secret')
+        self.assertTrue(isinstance(client._fetcher, OAuth2Fetcher))
+        self.assertEqual(client._fetcher.pool_maxsize, 20)
+        client.close()
+
+    def test_client_close(self):
+        """Client closes its session on close() and when used as a context manager"""
+        session = FakeSession()
+        with Client('ua') as client:
+            client._fetcher = RequestsFetcher(session=session)
+        self.assertTrue(session.closed)
+
+        # Replacing the fetcher releases the old one's connections
+        session = FakeSession()
+        client = Client('ua')
+        client._fetcher = RequestsFetcher(session=session)
+        client.set_consumer_key('key', 'secret')
+        self.assertTrue(session.closed)
+
+    def test_cassette(self):
+        """Responses can be recorded to a cassette and replayed from it"""
+        fd, path = tempfile.mkstemp(suffix='.json.gz')
+        os.close(fd)
+        os.remove(path)
+        try:
+            live = MemoryFetcher({
+                '/artists/1': (b'{"id": 1, "name": "Badger"}', 200, {'ETag': '"abc"'}),
+                '/database/search?q=badger&type=artist': (b'{"results": []}', 200),
+                '/image': (b'\x89PNG\xff', 200),
+            })
+            recorder = CassetteFetcher(path, live, mode='record')
+            self.m._fetcher = recorder
+            self.assertEqual(self.m.artist(1).name, 'Badger')
+            self.m._get('/database/search?q=badger&type=artist')
+            recorder.fetch(self.m, 'GET', '/image', json=False)
+            # Requests to the same URL with different bodies are told apart
+            live.fetch = lambda client, method, url, data=None, headers=None, json=True: \
+                (('{"rating": %d}' % data['rating']).encode('utf8'), 200)
+            for rating in (1, 5):
+                recorder.fetch(self.m, 'POST', '/wants/1', {'rating': rating})
+            del live.fetch
+            recorder.close()
+
+            player = CassetteFetcher(path)
+            self.assertEqual(len(player), 5)
+            self.assertEqual(player.fetch(None, 'POST', '/wants/1', {'rating': 5})[0], b'{"rating": 5}')
+            self.assertEqual(player.fetch(None, 'POST', '/wants/1', {'rating': 1})[0], b'{"rating": 1}')
+            self.assertEqual(player.fetch(None, 'POST', '/wants/1')[1], 404)
+            self.assertEqual(player.fetch(None, 'GET', 'https://api.discogs.com/artists/1'),
+                             (b'{"id": 1, "name": "Badger"}', 200, {'ETag': '"abc"'}))
+            self.assertEqual(player.fetch(None, 'GET', '/database/search?type=artist&q=badger')[0],
+                             b'{"results": []}')
+            self.assertEqual(player.fetch(None, 'GET', '/image')[0], b'\x89PNG\xff')
+            self.assertEqual(player.fetch(None, 'GET', '/artists/2')[1], 404)
+            self.assertEqual(player.fetch(None, 'DELETE', '/artists/1')[1], 404)
+            self.assertEqual(player.misses, ['/wants/1', '/artists/2', '/artists/1'])
+
+            # New requests are added to what was there
+            live.responses['/artists/2'] = (b'{"id": 2}', 200)
+            player = CassetteFetcher(path, live, mode='new')
+            player.fetch(None, 'GET', '/artists/2')
+            del live.responses['/artists/1']
+            self.assertEqual(player.fetch(None, 'GET', '/artists/1')[1], 200)
+            player.close()
+            self.assertEqual(len(CassetteFetcher(path)), 6)
+
+            self.assertRaises(ValueError, lambda: CassetteFetcher(path, mode='record'))
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_alternate_params(self):
+        """Filesystem fixtures are found whatever the order of their parameters"""
+        fetcher = self.d._fetcher.fetcher
+        content, status_code = fetcher.fetch(self.d, 'GET', '/users/example/wants?page=1&per_page=50')
+        self.assertEqual(status_code, 200)
+        content, status_code = fetcher.fetch(self.d, 'GET', '/users/example/wants?per_page=50&page=2')
+        self.assertEqual(status_code, 404)
+        self.assertEqual(len(fetcher._alternates), 1)
+
 
 def suite():
     suite = unittest.TestSuite()
@@ -0,0 +1,95 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+from discogs_client.exceptions import HTTPError
+from discogs_client.fetchers import LoggingDelegator, MemoryFetcher
+from discogs_client.hooks import Metrics
+from discogs_client.tests import DiscogsClientTestCase
+
+
+class Recorder(object):
+    def __init__(self):
+        self.events = []
+
+    def before_request(self, event):
+        self.events.append(('before_request', event.method, event.endpoint, event.status_code))
+
+    def after_response(self, event):
+        self.events.append(('after_response', event.method, event.endpoint, event.status_code))
+
+    def on_error(self, event):
+        self.events.append(('on_error', event.method, event.endpoint, type(event.error)))
+
+
+class BrokenFetcher(object):
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        raise IOError('connection reset')
+
+
+class HooksTestCase(DiscogsClientTestCase):
+    def test_events(self):
+        """Hooks are told about each request, response and error"""
+        recorder = self.d.hooks.add(Recorder())
+        self.d.release(1).title
+        self.assertRaises(HTTPError, lambda: self.d.release(0).title)
+        self.assertEqual(recorder.events, [
+            ('before_request', 'GET', '/releases/{id}', None),
+            ('after_response', 'GET', '/releases/{id}', 200),
+            ('before_request', 'GET', '/releases/{id}', None),
+            ('after_response', 'GET', '/releases/{id}', 404),
+            ('on_error', 'GET', '/releases/{id}', HTTPError),
+        ])
+
+        self.d.hooks.remove(recorder)
+        self.d.artist(1).name
+        self.assertEqual(len(recorder.events), 5)
+        self.assertFalse(self.d.hooks)
+        self.assertRaises(ValueError, lambda: self.d.hooks.register('after_request', print))
+
+    def test_metrics(self):
+        """Metrics aggregate requests per endpoint"""
+        metrics = self.d.hooks.add(Metrics(buckets=[1, 10]))
+        self.d.release(1).title
+        self.d.artist(1).name
+        self.d.artist(2).name
+        self.assertRaises(HTTPError, lambda: self.d.artist(0).name)
+
+        self.m._fetcher = BrokenFetcher()
+        self.m.hooks.add(metrics)
+        self.assertRaises(IOError, lambda: self.m.release(2).title)
+
+        stats = metrics.snapshot()
+        artists = stats[('GET', '/artists/{id}')]
+        self.assertEqual(artists['requests'], 3)
+        self.assertEqual(artists['statuses'], {200: 2, 404: 1})
+        self.assertEqual(artists['errors'], 1)
+        self.assertEqual(artists['latency_buckets'], [3, 0, 0])
+        self.assertTrue(artists['bytes'] > 0)
+
+        releases = stats[('GET', '/releases/{id}')]
+        self.assertEqual((releases['requests'], releases['errors']), (2, 1))
+
+        text = metrics.to_prometheus()
+        self.assertTrue('discogs_client_requests_total{method="GET",endpoint="/artists/{id}",status="200"} 2\n' in text)
+        self.assertTrue('discogs_client_request_duration_seconds_bucket'
+                        '{method="GET",endpoint="/artists/{id}",le="+Inf"} 3\n' in text)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_bounded_log(self):
+        """LoggingDelegator can keep only the most recent requests"""
+        fetcher = LoggingDelegator(MemoryFetcher({}), maxlen=2)
+        for url in ('/a', '/b', '/c'):
+            fetcher.fetch(None, 'GET', url)
+        self.assertEqual([r[1] for r in fetcher.requests], ['/b', '/c'])
+        self.assertEqual(fetcher.last_request[1], '/c')
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(HooksTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
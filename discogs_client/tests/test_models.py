@@ -1,7 +1,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import json
 import unittest
-from discogs_client.models import Artist, Release
+from discogs_client.models import Artist, Release, MissingKeys, PartialFields
 from discogs_client.tests import DiscogsClientTestCase
 from discogs_client.exceptions import HTTPError
 
@@ -22,6 +23,98 @@ class ModelsTestCase(DiscogsClientTestCase):
         m = self.d.master(4242)
         self.assertEqual(len(m.tracklist), 4)
 
+    def test_memoized_fields(self):
+        """Object and list fields are built once until the object is refreshed"""
+        r = self.d.release(1)
+        tracklist = r.tracklist
+        self.assertTrue(r.tracklist is tracklist)
+        self.assertTrue(r.artists[0] is r.artists[0])
+        self.assertTrue(tracklist[0].artists is tracklist[0].artists)
+
+        r.refresh()
+        self.assertFalse(r.tracklist is tracklist)
+        self.assertEqual(r.tracklist[0].title, tracklist[0].title)
+
+        m = self.d.master(4242)
+        self.assertTrue(m.main_release is m.main_release)
+
+        u = self.d.user('example')
+        registered = u.registered
+        self.assertTrue(u.registered is registered)
+
+    def test_compact_objects(self):
+        """API objects use slots and only allocate containers when needed"""
+        r = self.d.release(1)
+        self.assertFalse(hasattr(r, '__dict__'))
+        self.assertFalse(hasattr(r.tracklist[0], '__dict__'))
+        self.assertTrue(r._changes is None)
+        self.assertTrue(r._known_invalid_keys is None)
+
+        def fail():
+            r.foo = 'bar'
+        self.assertRaises(AttributeError, fail)
+
+        u = self.d.user('example')
+        u.name = 'Example'
+        self.assertEqual(u.changes, {'name': 'Example'})
+
+        # Subclasses defined elsewhere can still set attributes of their own
+        class MyRelease(Release):
+            def __init__(self, client, dict_):
+                super(MyRelease, self).__init__(client, dict_)
+                self.seen = True
+        mine = MyRelease(self.d, {'id': 1})
+        self.assertTrue(mine.seen)
+        self.assertEqual(mine.title, 'Stockholm')
+
+    def test_ensure_fields(self):
+        """Objects and lists load declared fields up front"""
+        r = self.d.release(1)
+        r.ensure('title', 'country')
+        self.assertEqual(len(self.d._fetcher.requests), 1)
+
+        u = self.d.user('example')
+        u.ensure('name', 'blorf')
+        self.assertEqual(len(self.d._fetcher.requests), 2)
+        self.assertEqual(u.name, 'Example Sampleman')
+        self.assertEqual(u.fetch('blorf'), None)
+        self.assertEqual(len(self.d._fetcher.requests), 2)
+
+        self.m._fetcher.fetcher.responses = {
+            '/database/search?page=1&per_page=50&q=x': (json.dumps({
+                'pagination': {'items': 3, 'page': 1, 'pages': 1, 'per_page': 50},
+                'results': [
+                    {'id': 1, 'type': 'release', 'title': 'A', 'country': 'US',
+                     'resource_url': '/releases/1'},
+                    {'id': 2, 'type': 'release', 'title': 'B',
+                     'resource_url': '/releases/2'},
+                    {'id': 3, 'type': 'artist', 'title': 'C',
+                     'resource_url': '/artists/3'},
+                ],
+            }).encode('utf8'), 200),
+            '/releases/2': (b'{"id": 2, "title": "B", "country": "UK", "resource_url": "/releases/2"}', 200),
+        }
+        results = self.m.search('x', fields=['country'])
+        self.assertEqual([getattr(r, 'country', None) for r in results], ['US', 'UK', None])
+        self.assertEqual([url for method, url, data, headers in self.m._fetcher.requests],
+                         ['/database/search?page=1&per_page=50&q=x', '/releases/2'])
+
+        # What the search results came with was recorded
+        self.assertEqual(self.m.partial_fields.get('/database/search?q=y', Release),
+                         frozenset(['id', 'type', 'title', 'resource_url']))
+
+        # A result that fails to refresh doesn't fail the page; reading it
+        # tries again
+        del self.m._fetcher.fetcher.responses['/releases/2']
+        results = self.m.search('x', fields=['country'])
+        self.assertEqual(results[0].country, 'US')
+        self.assertRaises(HTTPError, lambda: results[1].country)
+
+        # Lists without declared fields aren't recorded
+        self.m.partial_fields = PartialFields()
+        len(self.m.search('x'))
+        self.assertEqual(self.m.partial_fields.get('/database/search', Release), None)
+
     def test_user(self):
         """Users can be fetched and parsed"""
         u = self.d.user('example')
@@ -153,6 +246,19 @@ class ModelsTestCase(DiscogsClientTestCase):
         self.assertEqual(me.data['consumer_name'], 'Test Client')
         self.assertEqual(me, self.d.user('example'))
 
+    def test_missing_keys_bounded(self):
+        """Missing keys are only remembered for the most recently used resources"""
+        missing_keys = MissingKeys(max_entries=2)
+        releases = [Release(self.m, {'id': i}) for i in range(3)]
+        missing_keys.get(releases[0], create=True).add('notes')
+        missing_keys.get(releases[1], create=True)
+        self.assertEqual(missing_keys.get(Release(self.m, {'id': 0})), set(['notes']))
+        missing_keys.get(releases[2], create=True)
+        self.assertEqual(len(missing_keys), 2)
+        # The least recently used one is forgotten
+        self.assertEqual(missing_keys.get(releases[1]), None)
+        self.assertEqual(missing_keys.get(releases[0]), set(['notes']))
+
 
 def suite():
     suite = unittest.TestSuite()
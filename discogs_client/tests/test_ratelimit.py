@@ -0,0 +1,151 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import unittest
+from discogs_client import Client
+from discogs_client.exceptions import HTTPError, RateLimitError
+from discogs_client.fetchers import Fetcher
+from discogs_client.ratelimit import RateLimiter
+
+
+class FakeClock(object):
+    """A clock that only moves when something sleeps."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class SequenceFetcher(Fetcher):
+    """Replays a list of (content, status_code, headers) responses in order."""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def limiter(self, **kwargs):
+        return RateLimiter(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_token_bucket(self):
+        """Requests beyond the budget wait for the bucket to refill"""
+        limiter = self.limiter(limit=2, period=1.0)
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(limiter.remaining, 0)
+        self.assertEqual(self.clock.sleeps, [])
+
+        limiter.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 0.5)
+
+        self.clock.now += 10
+        self.assertEqual(limiter.remaining, 2)
+
+    def test_headers(self):
+        """The bucket follows the Discogs rate limit headers"""
+        limiter = self.limiter()
+        limiter.record(200, {
+            'X-Discogs-Ratelimit': '25',
+            'X-Discogs-Ratelimit-Remaining': '3',
+            'X-Discogs-Ratelimit-Used': '22',
+        })
+        self.assertEqual(limiter.limit, 25)
+        self.assertEqual(limiter.used, 22)
+        self.assertEqual(limiter.remaining, 3)
+
+        # A more optimistic server doesn't hand out tokens we've already spent
+        limiter.record(200, {'X-Discogs-Ratelimit-Remaining': '20'})
+        self.assertEqual(limiter.remaining, 3)
+
+        # Limiters sharing the limit only take their share of it
+        limiter = self.limiter(limit=14, share=4)
+        limiter.record(200, {'X-Discogs-Ratelimit': '60', 'X-Discogs-Ratelimit-Remaining': '8'})
+        self.assertEqual(limiter.limit, 15)
+        self.assertEqual(limiter.rate, 0.25)
+        self.assertEqual(limiter.remaining, 2)
+
+    def test_backoff(self):
+        """Consecutive 429s pause requests for longer and longer"""
+        limiter = self.limiter(limit=1000, backoff_base=1.0)
+        pauses = []
+        for _ in range(4):
+            start = self.clock.now
+            limiter.record(429, {})
+            limiter.acquire()
+            pauses.append(self.clock.now - start)
+
+        for i, pause in enumerate(pauses):
+            self.assertTrue(2 ** i / 2 <= pause <= 2 ** i)
+
+        # A successful response resets the backoff
+        limiter.record(200, {})
+        self.assertEqual(limiter._throttled, 0)
+
+    def test_shared_between_threads(self):
+        """Threads sharing a limiter draw from the same budget"""
+        limiter = self.limiter(limit=100)
+
+        def work():
+            for _ in range(10):
+                limiter.acquire()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(limiter.remaining, 60)
+
+    def test_client_retries_429(self):
+        """Client retries throttled requests after backing off"""
+        fetcher = SequenceFetcher([
+            (b'{"message": "slow down"}', 429, {'X-Discogs-Ratelimit-Remaining': '0'}),
+            (b'{"id": 1}', 200, {'X-Discogs-Ratelimit-Remaining': '59'}),
+        ])
+        client = Client('ua', rate_limiter=self.limiter())
+        client._base_url = ''
+        client._fetcher = fetcher
+
+        self.assertEqual(client._get('/artists/1'), {'id': 1})
+        self.assertEqual(fetcher.calls, 2)
+        self.assertTrue(self.clock.sleeps)
+
+    def test_client_gives_up(self):
+        """Client raises RateLimitError once it runs out of retries"""
+        throttled = (b'{"message": "slow down"}', 429, {})
+        fetcher = SequenceFetcher([throttled] * 3)
+        client = Client('ua', rate_limiter=self.limiter(max_retries=2))
+        client._fetcher = fetcher
+
+        self.assertRaises(RateLimitError, lambda: client._get('/artists/1'))
+        self.assertEqual(fetcher.calls, 3)
+
+        # Without a rate limiter a 429 is raised straight away
+        fetcher = SequenceFetcher([throttled])
+        client = Client('ua')
+        client._fetcher = fetcher
+        self.assertRaises(HTTPError, lambda: client._get('/artists/1'))
+        self.assertEqual(fetcher.calls, 1)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(RateLimiterTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,95 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unittest
+from requests.exceptions import ConnectionError
+from discogs_client import Client
+from discogs_client.exceptions import HTTPError
+from discogs_client.fetchers import Fetcher
+from discogs_client.hooks import Metrics
+from discogs_client.retry import RetryPolicy
+
+
+class FlakyFetcher(Fetcher):
+    """Replays a list of responses, raising the ones that are exceptions."""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+OK = (b'{"id": 1, "name": "Persuader, The"}', 200, {})
+UNAVAILABLE = (b'{"message": "Service Unavailable"}', 503, {})
+
+
+class RetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+
+    def client(self, responses, **kwargs):
+        policy = RetryPolicy(backoff_base=1.0, sleep=self.sleeps.append, **kwargs)
+        client = Client('ua', retry=policy)
+        client._base_url = ''
+        client._fetcher = FlakyFetcher(responses)
+        return client
+
+    def test_transient_errors(self):
+        """Transient statuses and connection errors are retried with backoff"""
+        client = self.client([UNAVAILABLE, ConnectionError('reset'), OK])
+        metrics = client.hooks.add(Metrics())
+        self.assertEqual(client._get('/artists/1')['id'], 1)
+        self.assertEqual(client._fetcher.calls, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertTrue(0.5 <= self.sleeps[0] <= 1.0)
+        self.assertTrue(1.0 <= self.sleeps[1] <= 2.0)
+
+        stat = metrics.snapshot()[('GET', '/artists/{id}')]
+        self.assertEqual(stat['retries'], 2)
+        self.assertEqual(stat['backoff'], sum(self.sleeps))
+
+    def test_give_up(self):
+        """Retries stop after max_retries, and other errors aren't retried"""
+        client = self.client([UNAVAILABLE] * 3, max_retries=2)
+        self.assertRaises(HTTPError, lambda: client._get('/artists/1'))
+        self.assertEqual(client._fetcher.calls, 3)
+
+        client = self.client([ConnectionError('reset')] * 3, max_retries=2)
+        self.assertRaises(ConnectionError, lambda: client._get('/artists/1'))
+        self.assertEqual(client._fetcher.calls, 3)
+
+        client = self.client([(b'{"message": "Not found"}', 404, {}), OK])
+        self.assertRaises(HTTPError, lambda: client._get('/artists/1'))
+        self.assertEqual(client._fetcher.calls, 1)
+
+        client = self.client([ValueError('bug'), OK])
+        self.assertRaises(ValueError, lambda: client._get('/artists/1'))
+
+    def test_methods(self):
+        """Only idempotent methods are retried, unless opted in"""
+        client = self.client([UNAVAILABLE, OK])
+        self.assertRaises(HTTPError, lambda: client._post('/artists/1', {}))
+        self.assertEqual(client._fetcher.calls, 1)
+
+        client = self.client([UNAVAILABLE, OK], methods=['GET', 'POST'])
+        self.assertEqual(client._post('/artists/1', {})['id'], 1)
+
+    def test_retry_after(self):
+        """Retry-After is honored, up to backoff_max"""
+        client = self.client([(b'{"message": "Busy"}', 503, {'Retry-After': '7'}),
+                              (b'{"message": "Busy"}', 503, {'Retry-After': '600'}), OK])
+        client._get('/artists/1')
+        self.assertEqual(self.sleeps, [7.0, 30.0])
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(RetryTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,120 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import unittest
+from discogs_client import Client, models
+from discogs_client.fetchers import Fetcher
+from discogs_client.sync import Sync
+from discogs_client.tests import paginated_response
+
+try:
+    from urllib.parse import urlsplit, parse_qs
+except ImportError:
+    from urlparse import urlsplit, parse_qs
+
+
+class InventoryFetcher(Fetcher):
+    """Serves pages of a list of listings, newest first."""
+    def __init__(self, listings):
+        self.listings = listings
+        self.urls = []
+
+    def fetch(self, client, method, url, data=None, headers=None, json_=True):
+        self.urls.append(url)
+        query = dict((k, v[0]) for k, v in parse_qs(urlsplit(url).query).items())
+        assert (query['sort'], query['sort_order']) == ('listed', 'desc')
+        items = sorted(self.listings, key=lambda l: l['posted'], reverse=True)
+        return paginated_response(items, int(query['page']), int(query['per_page']), 'listings')
+
+
+def listing(id, day, price=10.0):
+    return {'id': id, 'posted': '2014-06-{0:02d}T10:00:00-07:00'.format(day),
+            'price': {'value': price, 'currency': 'USD'}}
+
+
+class SyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.listings = [listing(i, i) for i in range(1, 21)]
+        self.fetcher = InventoryFetcher(self.listings)
+        self.client = Client('ua')
+        self.client._base_url = ''
+        self.client._fetcher = self.fetcher
+
+    def sync(self, state=None):
+        inventory = models.PaginatedList(self.client, '/inventory', 'listings', models.Listing)
+        return Sync(inventory, state, per_page=5)
+
+    def test_sync(self):
+        """Only the pages with new items are fetched on later runs"""
+        sync = self.sync()
+        diff = sync.run()
+        self.assertEqual(sorted(l.id for l in diff.added), list(range(1, 21)))
+        self.assertEqual((diff.updated, diff.removed), ([], []))
+        self.assertEqual(sync.requests, 4)
+
+        # The state survives a round trip through JSON
+        state = json.loads(json.dumps(sync.state))
+        self.assertEqual(state['watermark'], '2014-06-20T10:00:00-07:00')
+
+        self.listings.extend([listing(21, 21), listing(22, 22)])
+        sync = self.sync(state)
+        diff = sync.run()
+        self.assertEqual(sorted(l.id for l in diff.added), [21, 22])
+        self.assertEqual(sync.requests, 1)
+
+        # Nothing changed
+        diff = sync.run()
+        self.assertEqual(diff, ([], [], []))
+        self.assertEqual(sync.requests, 1)
+
+        # A relisted item moves to the top
+        self.listings[4] = listing(5, 23, price=12.0)
+        diff = sync.run()
+        self.assertEqual([l.id for l in diff.updated], [5])
+        self.assertEqual(diff.added, [])
+
+    def test_removals(self):
+        """Removed items are noticed from the item count"""
+        sync = self.sync()
+        sync.run()
+
+        del self.listings[3]
+        self.listings.append(listing(21, 21))
+        diff = sync.run()
+        self.assertEqual([l.id for l in diff.added], [21])
+        self.assertEqual(diff.removed, ['4'])
+        self.assertEqual(sync.requests, 1 + 4)
+        self.assertEqual(len(sync.fingerprints), 20)
+
+    def test_full(self):
+        """A full run notices changes to older items"""
+        sync = self.sync()
+        sync.run()
+        self.listings[0]['price']['value'] = 1.0
+        self.assertEqual(sync.run().updated, [])
+        self.assertEqual([l.id for l in sync.run(full=True).updated], [1])
+
+    def test_unknown_list(self):
+        """Lists the sync doesn't know how to order need to be told"""
+        lst = models.PaginatedList(self.client, '/artists/1/releases', 'releases', models.Release)
+        self.assertRaises(ValueError, lambda: Sync(lst))
+        self.assertEqual(Sync(lst, sort_key='year', date_key='year').id_key, 'id')
+
+    def test_list_untouched(self):
+        """The caller's list keeps its order and page size"""
+        inventory = models.PaginatedList(self.client, '/inventory', 'listings', models.Listing)
+        inventory.per_page = 3
+        sync = Sync(inventory, per_page=5)
+        sync.run()
+        self.assertEqual((inventory._sort_key, inventory.per_page), (None, 3))
+        self.assertEqual((sync.paginated._sort_key, sync.paginated.per_page), ('listed', 5))
+        self.assertEqual(len(inventory._pages), 0)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(SyncTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
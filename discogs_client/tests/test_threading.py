@@ -0,0 +1,193 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import random
+import sys
+import threading
+import time
+import unittest
+from six.moves.urllib.parse import urlsplit, parse_qsl
+from discogs_client import Client, Release
+from discogs_client.fetchers import Fetcher
+from discogs_client.models import MemoizedFieldDescriptor, PaginatedList
+from discogs_client.tests import paginated_response
+
+THREADS = 16
+ITEMS = 230
+RELEASES = [{'id': i, 'title': 'Release %d' % i} for i in range(1, ITEMS + 1)]
+
+
+class CatalogFetcher(Fetcher):
+    """
+    Serves a list of ITEMS partial releases, paged as requested, and each
+    release in full, yielding to other threads on every request.
+    """
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def fetch(self, client, method, url, data=None, headers=None, json=True):
+        with self._lock:
+            self.requests.append(url)
+        time.sleep(0.0005)
+        parts = urlsplit(url)
+        if parts.path == '/lists/1':
+            params = dict(parse_qsl(parts.query))
+            return paginated_response(RELEASES, int(params['page']), int(params['per_page']),
+                                      'releases')
+        if parts.path.startswith('/releases/'):
+            i = int(parts.path.rsplit('/', 1)[1])
+            return dumps({'id': i, 'title': 'Release %d' % i, 'country': 'C%d' % i,
+                          'year': 1900 + i})
+        return dumps({'message': 'Resource not found.'}, 404)
+
+
+def dumps(body, status_code=200):
+    return json.dumps(body).encode('utf8'), status_code
+
+
+class ThreadingTestCase(unittest.TestCase):
+    """Many threads sharing one client and its objects."""
+    def setUp(self):
+        # Switch threads as often as possible, to make races likelier
+        self.switch_interval = getattr(sys, 'getswitchinterval', lambda: None)()
+        if self.switch_interval is not None:
+            sys.setswitchinterval(1e-6)
+        self.client = Client('ua', identity_map=True)
+        self.client._base_url = ''
+        self.client._fetcher = CatalogFetcher()
+
+    def tearDown(self):
+        if self.switch_interval is not None:
+            sys.setswitchinterval(self.switch_interval)
+
+    def hammer(self, work):
+        errors = []
+
+        def run(n):
+            try:
+                work(n)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def releases(self):
+        return PaginatedList(self.client, '/lists/1', 'releases', Release)
+
+    def test_shared_objects(self):
+        """Objects read, refreshed and changed from many threads stay consistent"""
+        releases = self.releases()
+        items = list(releases)
+
+        def work(n):
+            rng = random.Random(n)
+            for release in rng.sample(items, 60):
+                i = release.id
+                self.assertEqual(release.title, 'Release %d' % i)
+                # Not in the list's partial data, so this refreshes
+                self.assertEqual(release.country, 'C%d' % i)
+                self.assertEqual(release.fetch('missing'), None)
+                if rng.random() < 0.2:
+                    release.refresh()
+                if rng.random() < 0.2:
+                    release.changes = {}
+                self.assertEqual(release.year, 1900 + i)
+                self.assertTrue(self.client.release(i) is release)
+
+        self.hammer(work)
+        refreshes = [url for url in self.client._fetcher.requests if url.startswith('/releases/')]
+        self.assertTrue(len(set(refreshes)) <= ITEMS)
+        for release in items:
+            self.assertEqual(release.data['title'], 'Release %d' % release.id)
+
+    def test_memo_from_stale_data(self):
+        """A field built from data swapped out meanwhile isn't memoized"""
+        class Title(MemoizedFieldDescriptor):
+            # Reads the title, then lets another "thread" refresh the object
+            def __init__(self, refreshes):
+                self.refreshes = refreshes
+
+            def _build(self, instance):
+                title = instance.data['title']
+                if self.refreshes:
+                    instance._update({'title': self.refreshes.pop(0)})
+                return title
+
+        release = self.client.release(1)
+        release.data['title'] = 'Old'
+        title = Title(['New'])
+        self.assertEqual(title.__get__(release, Release), 'New')
+        self.assertEqual(release._field_values, {title: 'New'})
+
+        # Data that keeps changing is never memoized
+        title = Title(['Newer', 'Newest'])
+        self.assertEqual(title.__get__(release, Release), 'Newer')
+        self.assertEqual(release._field_values, None)
+
+    def test_shared_list(self):
+        """A list read from many threads at once gives the same items to all"""
+        releases = self.releases().stream(max_pages=2)
+        expected = list(range(1, ITEMS + 1))
+
+        def work(n):
+            rng = random.Random(n)
+            self.assertEqual(len(releases), ITEMS)
+            self.assertEqual([r.id for r in releases], expected)
+            for _ in range(20):
+                i = rng.randrange(-ITEMS, ITEMS)
+                self.assertEqual(releases[i].id, expected[i])
+                start = rng.randrange(ITEMS)
+                self.assertEqual([r.id for r in releases[start:start + 30]], expected[start:start + 30])
+            self.assertEqual([r.id for r in releases.iter_stream()], expected)
+
+        self.hammer(work)
+        self.assertTrue(len(releases._pages) <= 2)
+
+    def test_shared_list_page_size(self):
+        """Bigger pages fetched for ranges don't change the list other threads read"""
+        releases = self.releases()
+        expected = list(range(1, ITEMS + 1))
+
+        def work(n):
+            rng = random.Random(n)
+            for _ in range(10):
+                start = rng.randrange(ITEMS)
+                if rng.random() < 0.5:
+                    self.assertEqual(releases[start].id, expected[start])
+                else:
+                    self.assertEqual([r.id for r in releases.take(start, 120)], expected[start:start + 120])
+
+        self.hammer(work)
+        self.assertEqual(releases.per_page, 50)
+        self.assertTrue(all(len(page) == 50 for i, page in releases._pages.items() if i < 5))
+
+    def test_take_while_iterating(self):
+        """A take() of a bigger range halfway through an iteration doesn't disturb it"""
+        expected = list(range(1, ITEMS + 1))
+        for prefetch in (0, 2):
+            releases = self.releases().prefetch(prefetch)
+            seen = []
+            for release in releases:
+                seen.append(release.id)
+                if len(seen) == 75:
+                    self.assertEqual([r.id for r in releases.take(0, 120)], expected[:120])
+                    self.assertEqual(releases.per_page, 50)
+            self.assertEqual(seen, expected)
+            self.assertEqual(releases[200].id, 201)
+            self.assertTrue(all(len(page) == 50 for i, page in releases._pages.items() if i < 5))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite = unittest.TestLoader().loadTestsFromTestCase(ThreadingTestCase)
+    return suite
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -43,6 +43,28 @@ class UtilsTestCase(DiscogsClientTestCase):
         self.assertEqual(p('2012-01-01T00:00:00'), datetime(2012, 1, 1, 0, 0, 0))
         self.assertEqual(p('2001-05-25T00:00:42'), datetime(2001, 5, 25, 0, 0, 42))
 
+    def test_canonical_url(self):
+        c = utils.canonical_url
+        self.assertEqual(c('/search?type=release&q=t%c3%a9st'), '/search?q=t%C3%A9st&type=release')
+        self.assertEqual(c('http://example.com/a?b=1&a=x+y&a=2'), 'http://example.com/a?a=2&a=x%20y&b=1')
+        self.assertEqual(c('http://example.com/a?b='), 'http://example.com/a?b=')
+        self.assertEqual(c('/artists/1'), '/artists/1')
+
+    def test_build_url(self):
+        b = utils.build_url
+        self.assertEqual(b('http://example.com', ('releases', 1)), 'http://example.com/releases/1')
+        self.assertEqual(b('http://example.com/', ('users', 'a b/c')), 'http://example.com/users/a%20b%2Fc')
+        self.assertEqual(b('/search?type=release&page=1', params={'page': 2, 'q': 'x y', 'f': None}),
+                         '/search?page=2&q=x%20y&type=release')
+        self.assertEqual(b('/search', params={'q': ['b', 'a']}), '/search?q=a&q=b')
+        self.assertEqual(b('/users/x', ('wants',), {'page': 1}), '/users/x/wants?page=1')
+        # Byte strings are taken as UTF-8
+        self.assertEqual(b('/users', ('caf\xe9'.encode('utf8'),), {'q': 't\xe9st'.encode('utf8')}),
+                         '/users/caf%C3%A9?q=t%C3%A9st')
+        # The same request always comes out the same
+        self.assertEqual(b('/search?q=x', params={'page': 1, 'per_page': 50}),
+                         b('/search?per_page=50', params={'page': 1, 'q': 'x'}))
+
 
 def suite():
     suite = unittest.TestSuite()
@@ -4,11 +4,14 @@ from datetime import datetime
 try:
     # python2
     from urllib2 import quote
+    from urlparse import urlsplit, urlunsplit, parse_qsl
     to_str = unicode
+    native_str = bytes
 except ImportError:
     # python3
-    from urllib.parse import quote
+    from urllib.parse import quote, urlsplit, urlunsplit, parse_qsl
     to_str = str
+    native_str = str
 
 
 def parse_timestamp(timestamp):
@@ -17,13 +20,92 @@ def parse_timestamp(timestamp):
 
 
 def update_qs(url, params):
-    """A not-very-intelligent function to glom parameters onto a query string."""
+    """
+    A not-very-intelligent function to glom parameters onto a query string.
+    Prefer build_url(), which merges and orders them.
+    """
     joined_qs = '&'.join('='.join((str(k), quote(to_str(v).encode('utf8'))))
                          for k, v in params.items())
     separator = '&' if '?' in url else '?'
     return url + separator + joined_qs
 
 
+def build_url(url, segments=(), params=None):
+    """
+    Build a URL from a base URL (which may have a query string), path
+    segments to append to it and query parameters to merge into it.
+    Parameters replace any of the same name in the base URL; None values are
+    left out, and lists give a parameter several values. The query string
+    comes out sorted and consistently encoded, so the same request always
+    gets the same URL, e.g.
+
+        build_url('https://api.discogs.com', ('releases', 1))
+        -> 'https://api.discogs.com/releases/1'
+        build_url('/database/search?type=release', params={'q': 't\xe9st', 'page': 2})
+        -> '/database/search?page=2&q=t%C3%A9st&type=release'
+    """
+    if segments:
+        path = '/'.join(quote(_text(segment).encode('utf8'), safe=b'') for segment in segments)
+        if not params and '?' not in url:
+            # The common case, e.g. a resource URL
+            return url.rstrip('/') + '/' + path
+
+    scheme, netloc, base_path, query, fragment = urlsplit(url)
+    if segments:
+        base_path = base_path.rstrip('/') + '/' + path
+    if not isinstance(query, native_str):
+        # On python2, parse_qsl() only decodes UTF-8 escapes in byte strings
+        query = query.encode('utf8')
+    pairs = parse_qsl(query, keep_blank_values=True)
+    if params:
+        pairs = [(k, v) for k, v in pairs if k not in params]
+        for key, value in params.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                pairs.extend((key, item) for item in value)
+            else:
+                pairs.append((key, value))
+    return urlunsplit((scheme, netloc, base_path, _encode_query(pairs), fragment))
+
+
+def _text(value):
+    """Text for a value, decoding byte strings as UTF-8."""
+    if isinstance(value, bytes):
+        return value.decode('utf8')
+    return to_str(value)
+
+
+def _encode_query(pairs):
+    pairs = sorted((_text(k), _text(v)) for k, v in pairs)
+    return '&'.join('='.join((quote(k.encode('utf8')), quote(v.encode('utf8')))) for k, v in pairs)
+
+
+def canonical_url(url):
+    """
+    Sort a URL's query parameters and normalize their encoding, so that
+    URLs naming the same request compare equal, e.g.
+    '/search?type=release&q=t%c3%a9st' -> '/search?q=t%C3%A9st&type=release'.
+    """
+    if '?' not in url:
+        return url
+    return build_url(url)
+
+
+def url_template(url):
+    """
+    Reduce a URL to the endpoint it belongs to, e.g.
+    'https://api.discogs.com/releases/1?page=2' -> '/releases/{id}'.
+    """
+    segments = urlsplit(url).path.split('/')
+    for i, segment in enumerate(segments):
+        if segment.isdigit():
+            segments[i] = '{id}'
+        elif segment and i > 0 and segments[i - 1] == 'users':
+            segments[i] = '{username}'
+    return '/'.join(segments)
+
+
 def omit_none(dict_):
     """Removes any key from a dict that has a value of None."""
     return dict((k, v) for k, v in dict_.items() if v is not None)
@@ -24,6 +24,7 @@ setup(
             'requests',
             'six',
             'oauthlib',
+            'futures; python_version < "3"',
             ],
         packages=[
             'discogs_client',